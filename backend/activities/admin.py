@@ -1,13 +1,13 @@
 from django.contrib import admin
-from .models import ActivityResult
+from .models import ActivityAttempt, ActivityResult
 
 
 @admin.register(ActivityResult)
 class ActivityResultAdmin(admin.ModelAdmin):
-    list_display = ['user', 'elective', 'activity_name', 'completed', 'engagement_score', 'total_interactions', 'attempts', 'date_completed']
+    list_display = ['user', 'elective', 'activity_name', 'completed', 'engagement_score', 'total_interactions', 'attempts', 'performance_score', 'date_completed']
     list_filter = ['elective', 'completed', 'date_completed', 'date_updated']
     search_fields = ['user__username', 'user__email', 'activity_name', 'elective']
-    readonly_fields = ['date_completed', 'date_updated', 'calculate_performance_score_display']
+    readonly_fields = ['date_completed', 'date_updated', 'performance_score_version', 'calculate_performance_score_display']
     fieldsets = (
         ('User & Activity', {
             'fields': ('user', 'elective', 'activity_name')
@@ -19,7 +19,7 @@ class ActivityResultAdmin(admin.ModelAdmin):
             'fields': ('engagement_score', 'total_interactions', 'interaction_rate', 'time_efficiency', 'improvement_rate', 'quality_indicators')
         }),
         ('Calculated Score', {
-            'fields': ('calculate_performance_score_display',)
+            'fields': ('calculate_performance_score_display', 'performance_score_version')
         }),
         ('Timestamps', {
             'fields': ('date_completed', 'date_updated')
@@ -27,5 +27,21 @@ class ActivityResultAdmin(admin.ModelAdmin):
     )
     
     def calculate_performance_score_display(self, obj):
-        return f"{obj.calculate_performance_score():.2f}%"
+        return f"{obj.performance_score:.2f}%"
     calculate_performance_score_display.short_description = 'Performance Score'
+
+
+
+@admin.register(ActivityAttempt)
+class ActivityAttemptAdmin(admin.ModelAdmin):
+    """Attempt history is append-only, so the admin is read-only"""
+    list_display = ['activity_result', 'completed', 'completion_time', 'engagement_score', 'time_efficiency', 'performance_score', 'attempted_at']
+    list_filter = ['activity_result__elective', 'completed', 'attempted_at']
+    search_fields = ['activity_result__user__username', 'activity_result__activity_name']
+    list_select_related = ['activity_result__user']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
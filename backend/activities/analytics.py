@@ -0,0 +1,116 @@
+"""
+Single-query aggregation for activity analysis.
+
+Every statistic ActivityAnalysisView needs (overall, per elective and
+first/last-by-date trends) is computed by one SELECT with window functions,
+so the number of round trips does not depend on how many electives exist.
+"""
+from django.db.models import Avg, Count, F, Window
+from django.db.models.functions import FirstValue, LastValue
+from django.db.models.expressions import RowRange
+
+from core.cache import shared_cached
+
+from .models import ActivityResult
+
+
+def _windowed(expression, partition_by=None, ordered=False):
+    if not ordered:
+        return Window(expression, partition_by=partition_by)
+    # Whole-partition frame so LAST_VALUE sees the last row, not the current one
+    return Window(
+        expression,
+        partition_by=partition_by,
+        order_by=[F('date_completed').asc(), F('id').asc()],
+        frame=RowRange(start=None, end=None)
+    )
+
+
+def summarize_activities(queryset):
+    """
+    Aggregate an ActivityResult queryset in one query.
+
+    Returns None for an empty queryset, otherwise a dict with the overall
+    statistics, a `by_elective` dict keyed by elective code (only electives
+    that have rows) and the first/last activity by completion date.
+    """
+    elective = [F('elective')]
+    rows = queryset.annotate(
+        # Overall (one partition)
+        total=_windowed(Count('id')),
+        avg_completion_time=_windowed(Avg('completion_time')),
+        avg_engagement=_windowed(Avg('engagement_score')),
+        avg_time_efficiency=_windowed(Avg('time_efficiency')),
+        avg_interactions=_windowed(Avg('total_interactions')),
+        avg_score=_windowed(Avg('performance_score')),
+        first_date=_windowed(FirstValue('date_completed'), ordered=True),
+        last_date=_windowed(LastValue('date_completed'), ordered=True),
+        first_score=_windowed(FirstValue('performance_score'), ordered=True),
+        last_score=_windowed(LastValue('performance_score'), ordered=True),
+        first_engagement=_windowed(FirstValue('engagement_score'), ordered=True),
+        last_engagement=_windowed(LastValue('engagement_score'), ordered=True),
+        # Per elective
+        elective_total=_windowed(Count('id'), elective),
+        elective_avg_completion_time=_windowed(Avg('completion_time'), elective),
+        elective_avg_engagement=_windowed(Avg('engagement_score'), elective),
+        elective_avg_time_efficiency=_windowed(Avg('time_efficiency'), elective),
+        elective_avg_score=_windowed(Avg('performance_score'), elective),
+        elective_first_score=_windowed(FirstValue('performance_score'), elective, ordered=True),
+        elective_last_score=_windowed(LastValue('performance_score'), elective, ordered=True),
+    ).values(
+        'elective', 'total', 'avg_completion_time', 'avg_engagement', 'avg_time_efficiency',
+        'avg_interactions', 'avg_score', 'first_date', 'last_date', 'first_score', 'last_score',
+        'first_engagement', 'last_engagement', 'elective_total', 'elective_avg_completion_time',
+        'elective_avg_engagement', 'elective_avg_time_efficiency', 'elective_avg_score',
+        'elective_first_score', 'elective_last_score',
+    )
+
+    summary = None
+    for row in rows:
+        if summary is None:
+            summary = {
+                'total': row['total'],
+                'avg_completion_time': row['avg_completion_time'],
+                'avg_engagement': row['avg_engagement'],
+                'avg_time_efficiency': row['avg_time_efficiency'],
+                'avg_interactions': row['avg_interactions'],
+                'avg_score': row['avg_score'],
+                'first': {
+                    'date_completed': row['first_date'],
+                    'score': row['first_score'],
+                    'engagement_score': row['first_engagement'],
+                },
+                'last': {
+                    'date_completed': row['last_date'],
+                    'score': row['last_score'],
+                    'engagement_score': row['last_engagement'],
+                },
+                'by_elective': {},
+            }
+        if row['elective'] not in summary['by_elective']:
+            summary['by_elective'][row['elective']] = {
+                'total': row['elective_total'],
+                'avg_completion_time': row['elective_avg_completion_time'],
+                'avg_engagement': row['elective_avg_engagement'],
+                'avg_time_efficiency': row['elective_avg_time_efficiency'],
+                'avg_score': row['elective_avg_score'],
+                'first_score': row['elective_first_score'],
+                'last_score': row['elective_last_score'],
+            }
+
+    return summary
+
+
+def peer_averages():
+    """Averages over every completed activity, from the shared cache"""
+    return shared_cached('peer_averages', compute_peer_averages)
+
+
+def compute_peer_averages():
+    """Averages over every completed activity, in one aggregate query"""
+    return ActivityResult.objects.filter(completed=True).aggregate(
+        total=Count('id'),
+        avg_engagement=Avg('engagement_score'),
+        avg_completion_time=Avg('completion_time'),
+        avg_time_efficiency=Avg('time_efficiency'),
+    )
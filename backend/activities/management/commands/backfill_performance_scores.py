@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+
+from activities.models import ActivityResult, PERFORMANCE_SCORE_VERSION
+from activities.signals import activity_results_changed
+
+
+class Command(BaseCommand):
+    help = "Recompute stored ActivityResult.performance_score values in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help="Rows loaded and written per batch (default: 1000)"
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help="Recompute every row, not only rows scored with an older formula version"
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        queryset = ActivityResult.objects.order_by('pk').only(
+            'id', 'user_id', 'completed', 'engagement_score', 'time_efficiency', 'improvement_rate'
+        )
+        if not options['all']:
+            queryset = queryset.exclude(performance_score_version=PERFORMANCE_SCORE_VERSION)
+
+        updated = 0
+        last_pk = 0
+        while True:
+            # Keyset pagination keeps every chunk an indexed range scan
+            chunk = list(queryset.filter(pk__gt=last_pk)[:chunk_size])
+            if not chunk:
+                break
+
+            for activity in chunk:
+                activity.performance_score = activity.calculate_performance_score()
+                activity.performance_score_version = PERFORMANCE_SCORE_VERSION
+            ActivityResult.objects.bulk_update(chunk, ['performance_score', 'performance_score_version'])
+
+            # bulk_update skips post_save, so refresh derived data explicitly
+            activity_results_changed.send(
+                sender=ActivityResult, user_ids=[activity.user_id for activity in chunk]
+            )
+
+            updated += len(chunk)
+            last_pk = chunk[-1].pk
+            self.stdout.write(f"Recomputed {updated} activity scores...")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {updated} activity results scored with formula version {PERFORMANCE_SCORE_VERSION}."
+        ))
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_rollups(apps, schema_editor):
+    """Seed the rollup table from existing completed activities"""
+    ActivityResult = apps.get_model('activities', 'ActivityResult')
+    ActivityScoreRollup = apps.get_model('activities', 'ActivityScoreRollup')
+
+    scores_by_user = {}
+    for activity in ActivityResult.objects.filter(completed=True).order_by('user_id', '-date_completed'):
+        # Same weights as ActivityResult.calculate_performance_score()
+        score = min(100, 30 + activity.engagement_score * 0.3 + activity.time_efficiency * 0.2
+                    + min(100, activity.improvement_rate * 20) * 0.2)
+        scores_by_user.setdefault(activity.user_id, []).append(score)
+
+    ActivityScoreRollup.objects.bulk_create([
+        ActivityScoreRollup(user_id=user_id, completed_count=len(scores), average_score=sum(scores) / len(scores))
+        for user_id, scores in scores_by_user.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0001_initial'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityScoreRollup',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='activity_score_rollup', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('completed_count', models.IntegerField(default=0)),
+                ('average_score', models.FloatField(db_index=True, default=0)),
+                ('date_updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:08
+
+from django.db import migrations, models
+
+
+def compute_performance_scores(apps, schema_editor):
+    """Store the version 1 performance score on existing rows"""
+    ActivityResult = apps.get_model('activities', 'ActivityResult')
+
+    batch = []
+    for activity in ActivityResult.objects.defer('quality_indicators').iterator(chunk_size=1000):
+        # Same weights as ActivityResult.calculate_performance_score()
+        activity.performance_score = min(
+            100,
+            (30 if activity.completed else 0) + activity.engagement_score * 0.3
+            + activity.time_efficiency * 0.2 + min(100, activity.improvement_rate * 20) * 0.2
+        )
+        activity.performance_score_version = 1
+        batch.append(activity)
+        if len(batch) >= 1000:
+            ActivityResult.objects.bulk_update(batch, ['performance_score', 'performance_score_version'])
+            batch = []
+    ActivityResult.objects.bulk_update(batch, ['performance_score', 'performance_score_version'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0002_activityscorerollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activityresult',
+            name='performance_score',
+            field=models.FloatField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='activityresult',
+            name='performance_score_version',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.RunPython(compute_performance_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:26
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def seed_attempt_log(apps, schema_editor):
+    """Start each existing activity's history with its latest stored attempt"""
+    ActivityResult = apps.get_model('activities', 'ActivityResult')
+    ActivityAttempt = apps.get_model('activities', 'ActivityAttempt')
+
+    batch = []
+    rows = ActivityResult.objects.values_list(
+        'id', 'completion_time', 'completed', 'engagement_score', 'time_efficiency', 'performance_score', 'date_updated'
+    )
+    for activity_id, completion_time, completed, engagement, efficiency, score, date_updated in rows.iterator(chunk_size=1000):
+        batch.append(ActivityAttempt(
+            activity_result_id=activity_id,
+            completion_time=completion_time,
+            completed=completed,
+            engagement_score=engagement,
+            time_efficiency=efficiency,
+            performance_score=score,
+            attempted_at=date_updated,
+        ))
+        if len(batch) >= 1000:
+            ActivityAttempt.objects.bulk_create(batch)
+            batch = []
+    ActivityAttempt.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0003_activityresult_performance_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completion_time', models.DurationField()),
+                ('completed', models.BooleanField(default=False)),
+                ('engagement_score', models.FloatField(default=0)),
+                ('time_efficiency', models.FloatField(default=0)),
+                ('performance_score', models.FloatField(default=0)),
+                ('attempted_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('activity_result', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='attempt_log', to='activities.activityresult')),
+            ],
+            options={
+                'ordering': ['attempted_at', 'id'],
+                'indexes': [models.Index(fields=['activity_result', 'attempted_at'], name='activities__activit_32d762_idx')],
+            },
+        ),
+        migrations.RunPython(seed_attempt_log, migrations.RunPython.noop),
+    ]
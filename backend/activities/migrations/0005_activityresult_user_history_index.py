@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0004_activityattempt'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activityresult',
+            index=models.Index(fields=['user', '-date_completed', '-id'], name='activity_user_history_idx'),
+        ),
+    ]
@@ -1,5 +1,31 @@
-from django.db import models
+from django.db import connections, models
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+# Weights used by ActivityResult.calculate_performance_score()
+PERFORMANCE_SCORE_WEIGHTS = {
+    'completion': 30,     # Points for a completed activity
+    'engagement': 0.3,    # Per engagement point (0-100)
+    'efficiency': 0.2,    # Per time efficiency point (0-100)
+    'improvement': 0.2,   # Per improvement point (improvement_rate * 20, capped at 100)
+}
+
+# Bump whenever PERFORMANCE_SCORE_WEIGHTS or the formula change, then run
+# `manage.py backfill_performance_scores` to recompute stored rows.
+PERFORMANCE_SCORE_VERSION = 1
+
+
+def performance_score(completed, engagement_score, time_efficiency, improvement_rate):
+    """Overall performance score (0-100) from an activity's raw metrics"""
+    # Weighted combination of metrics
+    weights = PERFORMANCE_SCORE_WEIGHTS
+    completion_weight = weights['completion'] if completed else 0
+    engagement_weight = engagement_score * weights['engagement']
+    efficiency_weight = time_efficiency * weights['efficiency']
+    improvement_weight = min(100, improvement_rate * 20) * weights['improvement']
+    
+    return min(100, completion_weight + engagement_weight + efficiency_weight + improvement_weight)
+
 
 class ActivityResult(models.Model):
     ELECTIVE_CHOICES = [
@@ -25,6 +51,10 @@ class ActivityResult(models.Model):
     last_attempt_time = models.DurationField(null=True, blank=True)  # Time on last attempt
     improvement_rate = models.FloatField(default=0)  # Improvement from first to last attempt
     
+    # Stored calculate_performance_score() so averages can be computed in SQL
+    performance_score = models.FloatField(default=0, db_index=True)
+    performance_score_version = models.PositiveSmallIntegerField(default=0)  # Formula version of performance_score
+    
     date_completed = models.DateTimeField(auto_now_add=True)
     date_updated = models.DateTimeField(auto_now=True)
     
@@ -32,16 +62,111 @@ class ActivityResult(models.Model):
         db_table = 'survey_activityresult'  # Use existing table name from survey app
         unique_together = ['user', 'elective', 'activity_name']
         ordering = ['-date_completed']
+        indexes = [
+            # Keyset pagination of a user's history (ActivityResultView.get)
+            models.Index(fields=['user', '-date_completed', '-id'], name='activity_user_history_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.elective} - {self.activity_name}"
     
     def calculate_performance_score(self):
         """Calculate overall performance score (0-100)"""
-        # Weighted combination of metrics
-        completion_weight = 30 if self.completed else 0
-        engagement_weight = self.engagement_score * 0.3
-        efficiency_weight = self.time_efficiency * 0.2
-        improvement_weight = min(100, self.improvement_rate * 20) * 0.2
+        return performance_score(self.completed, self.engagement_score, self.time_efficiency, self.improvement_rate)
+    
+    def save(self, *args, **kwargs):
+        self.performance_score = self.calculate_performance_score()
+        self.performance_score_version = PERFORMANCE_SCORE_VERSION
+        
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'performance_score', 'performance_score_version'}
         
-        return min(100, completion_weight + engagement_weight + efficiency_weight + improvement_weight)
+        super().save(*args, **kwargs)
+
+
+class ActivityAttempt(models.Model):
+    """
+    Append-only log of every submitted attempt.
+    
+    ActivityResult keeps the latest attempt as a running summary; rows here
+    are only ever inserted, so the full history is kept. The log does not
+    reduce contention: every submission still upserts, and so locks, the
+    summary row in the same transaction (see activities.upsert).
+    """
+    activity_result = models.ForeignKey(ActivityResult, on_delete=models.CASCADE, related_name='attempt_log', db_index=False)
+    completion_time = models.DurationField()
+    completed = models.BooleanField(default=False)
+    engagement_score = models.FloatField(default=0)
+    time_efficiency = models.FloatField(default=0)
+    performance_score = models.FloatField(default=0)  # Score of the summary row after this attempt
+    attempted_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [models.Index(fields=['activity_result', 'attempted_at'])]
+        ordering = ['attempted_at', 'id']
+    
+    def __str__(self):
+        return f"{self.activity_result_id} @ {self.attempted_at:%Y-%m-%d %H:%M:%S}"
+
+
+class ActivityScoreRollup(models.Model):
+    """Per-user average performance score, kept sorted by an index for percentile lookups"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='activity_score_rollup')
+    completed_count = models.IntegerField(default=0)  # Completed activities included in the average
+    average_score = models.FloatField(default=0, db_index=True)  # Mean of performance_score
+    date_updated = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.average_score:.2f} ({self.completed_count} activities)"
+    
+    @classmethod
+    def refresh_for_users(cls, user_ids, using='default'):
+        """
+        Recompute the rollup rows of these users from their completed activities.
+        
+        Two set-based statements whatever the number of users: an
+        INSERT ... SELECT ... ON CONFLICT upsert of the grouped averages, and a
+        delete of the rows of users left without completed activities.
+        """
+        user_ids = sorted(set(user_ids))
+        if not user_ids:
+            return
+        
+        connection = connections[using]
+        qn = connection.ops.quote_name
+        table = qn(cls._meta.db_table)
+        results = qn(ActivityResult._meta.db_table)
+        rollup_user, count, average, updated = (
+            qn(cls._meta.get_field(name).column) for name in ('user', 'completed_count', 'average_score', 'date_updated')
+        )
+        user, score, completed = (
+            qn(ActivityResult._meta.get_field(name).column) for name in ('user', 'performance_score', 'completed')
+        )
+        placeholders = ', '.join(['%s'] * len(user_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} ({rollup_user}, {count}, {average}, {updated}) "
+                f"SELECT {user}, COUNT(*), AVG({score}), %s FROM {results} "
+                f"WHERE {user} IN ({placeholders}) AND {completed} "
+                f"GROUP BY {user} "
+                f"ON CONFLICT ({rollup_user}) DO UPDATE SET {count} = EXCLUDED.{count}, "
+                f"{average} = EXCLUDED.{average}, {updated} = EXCLUDED.{updated}",
+                [cls._meta.get_field('date_updated').get_db_prep_save(timezone.now(), connection), *user_ids]
+            )
+        
+        # Users without completed activities are not ranked
+        cls.objects.using(using).filter(user_id__in=user_ids).exclude(
+            user_id__in=ActivityResult.objects.filter(user_id__in=user_ids, completed=True).values('user_id')
+        ).delete()
+    
+    @classmethod
+    def percentile_of(cls, score, user_id=None):
+        """Share of ranked users whose average score is below `score` (two indexed counts)"""
+        total = cls.objects.count()
+        if not total:
+            return None
+        # A user never ranks below themselves, even if their stored average
+        # differs from `score` in the last float digit
+        below = cls.objects.filter(average_score__lt=score).exclude(user_id=user_id).count()
+        return (below / total) * 100
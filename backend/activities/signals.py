@@ -0,0 +1,34 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from core.response_cache import response_cache
+from invalidation import bus
+
+from .models import ActivityResult, ActivityScoreRollup
+
+# Sent with `user_ids` whenever ActivityResult rows are written or removed.
+# Code that writes rows without going through Model.save() (bulk upserts,
+# raw SQL) must send it explicitly so derived data stays current. Send it
+# inside the write's transaction: receivers update derived rows with it.
+activity_results_changed = Signal()
+
+
+@receiver(post_save, sender=ActivityResult)
+@receiver(post_delete, sender=ActivityResult)
+def activity_result_written(sender, instance, **kwargs):
+    activity_results_changed.send(sender=ActivityResult, user_ids=[instance.user_id])
+
+
+@receiver(activity_results_changed)
+def refresh_score_rollups(sender, user_ids, **kwargs):
+    ActivityScoreRollup.refresh_for_users(user_ids)
+
+
+@receiver(activity_results_changed)
+def invalidate_cached_responses(sender, user_ids, **kwargs):
+    # The cache is not transactional: bumping before the commit would let a
+    # concurrent request cache the old rows again under the new version
+    user_ids = list(user_ids)
+    transaction.on_commit(lambda: response_cache.bump(user_ids))
+    bus.publish(bus.RESPONSE_CACHE, user_ids)
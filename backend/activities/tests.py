@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from .models import ActivityAttempt, ActivityResult, ActivityScoreRollup, performance_score
+from .upsert import upsert_activity_results
+
+
+def submission(user, **overrides):
+    row = {
+        'user_id': user.id,
+        'elective': 'ITBA',
+        'activity_name': 'Read the Sales Report',
+        'completion_time': timedelta(seconds=200),
+        'completed': True,
+        'engagement_score': 50,
+        'total_interactions': 10,
+        'interaction_rate': 3,
+        'time_efficiency': 60,
+        'quality_indicators': {},
+        'attempts': 1,
+    }
+    row.update(overrides)
+    return row
+
+
+def retry_improvement(old_seconds, new_seconds, old_engagement, new_engagement):
+    """improvement_rate the upsert derives on a retry (same rules as ActivityResultView.post)"""
+    time_improvement = (old_seconds - new_seconds) / old_seconds * 100
+    return time_improvement * 0.5 + max(0, new_engagement - old_engagement) * 0.5
+
+
+class UpsertActivityResultsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('student', password='password')
+
+    def test_first_submission_inserts_a_row(self):
+        result, = upsert_activity_results([submission(self.user)])
+
+        self.assertTrue(result['created'])
+        self.assertIsInstance(result['performance_score'], float)
+        self.assertEqual(result['performance_score'], performance_score(True, 50, 60, 0))
+
+        activity = ActivityResult.objects.get(pk=result['id'])
+        self.assertEqual(activity.first_attempt_time, timedelta(seconds=200))
+        self.assertEqual(activity.last_attempt_time, timedelta(seconds=200))
+        self.assertEqual(activity.improvement_rate, 0)
+        self.assertEqual(activity.performance_score, result['performance_score'])
+        self.assertEqual(ActivityAttempt.objects.filter(activity_result=activity).count(), 1)
+        self.assertEqual(ActivityScoreRollup.objects.get(user=self.user).completed_count, 1)
+
+    def test_retry_that_improves_updates_the_score(self):
+        first, = upsert_activity_results([submission(self.user)])
+        retry, = upsert_activity_results([submission(
+            self.user, completion_time=timedelta(seconds=150), engagement_score=70, attempts=2
+        )])
+
+        improvement = retry_improvement(200, 150, 50, 70)
+        self.assertFalse(retry['created'])
+        self.assertEqual(retry['id'], first['id'])
+        self.assertAlmostEqual(retry['performance_score'], performance_score(True, 70, 60, improvement))
+        self.assertGreater(retry['performance_score'], first['performance_score'])
+
+        activity = ActivityResult.objects.get(pk=first['id'])
+        self.assertAlmostEqual(activity.improvement_rate, improvement)
+        self.assertEqual(activity.first_attempt_time, timedelta(seconds=200))
+        self.assertEqual(activity.last_attempt_time, timedelta(seconds=150))
+        self.assertEqual(activity.attempts, 2)
+        self.assertEqual(ActivityAttempt.objects.filter(activity_result=activity).count(), 2)
+
+    def test_duplicates_in_one_batch_apply_as_retries_in_order(self):
+        results = upsert_activity_results([
+            submission(self.user),
+            submission(self.user, activity_name='Find the Problem'),
+            submission(self.user, completion_time=timedelta(seconds=100), engagement_score=80),
+        ])
+
+        self.assertEqual([result['created'] for result in results], [True, True, False])
+        self.assertEqual(results[0]['id'], results[2]['id'])
+        self.assertEqual(ActivityResult.objects.filter(user=self.user).count(), 2)
+
+        improvement = retry_improvement(200, 100, 50, 80)
+        activity = ActivityResult.objects.get(pk=results[0]['id'])
+        self.assertEqual(activity.completion_time, timedelta(seconds=100))
+        self.assertAlmostEqual(activity.improvement_rate, improvement)
+        self.assertAlmostEqual(results[2]['performance_score'], performance_score(True, 80, 60, improvement))
+        self.assertEqual(ActivityAttempt.objects.filter(activity_result=activity).count(), 2)
+        self.assertEqual(ActivityScoreRollup.objects.get(user=self.user).completed_count, 2)
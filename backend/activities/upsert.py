@@ -0,0 +1,239 @@
+"""
+Single-statement upsert for ActivityResult rows.
+
+Submissions are written with INSERT ... ON CONFLICT DO UPDATE, so a new
+row and a retry of an existing one both cost one round trip, and two
+concurrent submissions for the same activity can no longer race into the
+unique_together constraint. On a retry the first-attempt time, improvement
+rate and performance score are derived from the existing row inside the
+statement, with the same rules ActivityResultView.post used to apply in
+Python. Works on PostgreSQL and SQLite (3.35+ for RETURNING).
+
+Every submission is also appended to ActivityAttempt in the same
+transaction, so the summary row only holds the latest attempt while the
+full history stays queryable. The summary is still written synchronously:
+concurrent submissions for one (user, elective, activity) serialize on its
+row lock, and the attempt insert adds to that transaction rather than
+replacing the upsert. The lock is per student and activity, so in
+practice only a client retrying its own submission waits on it.
+
+activities.signals.activity_results_changed is sent before the commit, so
+the derived writes (score rollups, stale recommendation flags, the
+invalidation event) are set-based statements in the same transaction
+rather than separate transactions after it. A POST therefore costs the
+upsert, the attempt insert and four statements for derived data.
+"""
+from functools import lru_cache
+
+from django.db import DEFAULT_DB_ALIAS, NotSupportedError, connections, transaction
+from django.utils import timezone
+
+from .models import ActivityAttempt, ActivityResult, PERFORMANCE_SCORE_WEIGHTS, PERFORMANCE_SCORE_VERSION, performance_score
+from .signals import activity_results_changed
+
+# Values supplied by the caller for each row
+INPUT_FIELDS = [
+    'user_id', 'elective', 'activity_name', 'completion_time', 'completed', 'engagement_score',
+    'total_interactions', 'interaction_rate', 'time_efficiency', 'quality_indicators', 'attempts',
+]
+
+# Columns written by the INSERT (inputs plus derived and timestamp columns)
+INSERT_FIELDS = INPUT_FIELDS + [
+    'first_attempt_time', 'last_attempt_time', 'improvement_rate', 'performance_score',
+    'performance_score_version', 'date_completed', 'date_updated',
+]
+
+# Columns a retry overwrites with the submitted values
+REPLACED_FIELDS = [
+    'completion_time', 'completed', 'engagement_score', 'total_interactions', 'interaction_rate',
+    'time_efficiency', 'quality_indicators', 'attempts', 'performance_score_version', 'date_updated',
+]
+
+SUPPORTED_VENDORS = ('postgresql', 'sqlite')
+
+# PostgreSQL caps a statement at 65535 bind parameters
+MAX_QUERY_PARAMS = 65535
+
+FIELDS = {f: ActivityResult._meta.get_field(f) for f in INSERT_FIELDS + ['id']}
+
+
+def _sql_functions(vendor):
+    if vendor == 'postgresql':
+        return {
+            'least': 'LEAST',
+            'greatest': 'GREATEST',
+            'seconds': 'EXTRACT(EPOCH FROM {})',
+        }
+    # SQLite stores durations as integer microseconds and has scalar MIN/MAX
+    return {
+        'least': 'MIN',
+        'greatest': 'MAX',
+        'seconds': '({} / 1000000.0)',
+    }
+
+
+@lru_cache(maxsize=64)
+def _upsert_sql(vendor, row_count):
+    if vendor not in SUPPORTED_VENDORS:
+        raise NotSupportedError(f"Activity result upserts are not implemented for {vendor}.")
+
+    fn = _sql_functions(vendor)
+    qn = connections[DEFAULT_DB_ALIAS].ops.quote_name
+    table = qn(ActivityResult._meta.db_table)
+    column = {f: qn(field.column) for f, field in FIELDS.items()}
+
+    def existing(field):
+        return f"{table}.{column[field]}"
+
+    def submitted(field):
+        return f"EXCLUDED.{column[field]}"
+
+    # Improvement = reduction in time or increase in engagement (50/50)
+    old_seconds = fn['seconds'].format(existing('completion_time'))
+    new_seconds = fn['seconds'].format(submitted('completion_time'))
+    time_improvement = (
+        f"CASE WHEN {old_seconds} > 0 "
+        f"THEN (({old_seconds} - {new_seconds}) / {old_seconds}) * 100 ELSE 0 END"
+    )
+    engagement_improvement = (
+        f"{fn['greatest']}(0, {submitted('engagement_score')} - {existing('engagement_score')})"
+    )
+    improvement = f"(({time_improvement}) * 0.5 + ({engagement_improvement}) * 0.5)"
+
+    # Same formula as ActivityResult.calculate_performance_score()
+    weights = PERFORMANCE_SCORE_WEIGHTS
+    score = (
+        f"{fn['least']}(100, "
+        f"CASE WHEN {submitted('completed')} THEN {float(weights['completion'])!r} ELSE 0 END"
+        f" + {submitted('engagement_score')} * {float(weights['engagement'])!r}"
+        f" + {submitted('time_efficiency')} * {float(weights['efficiency'])!r}"
+        f" + {fn['least']}(100, {improvement} * 20) * {float(weights['improvement'])!r})"
+    )
+
+    assignments = [f"{column[f]} = {submitted(f)}" for f in REPLACED_FIELDS] + [
+        # A missing or zero first-attempt time falls back to the previous attempt
+        f"{column['first_attempt_time']} = CASE WHEN {fn['seconds'].format(existing('first_attempt_time'))} <> 0 "
+        f"THEN {existing('first_attempt_time')} ELSE {existing('completion_time')} END",
+        f"{column['last_attempt_time']} = {submitted('completion_time')}",
+        f"{column['improvement_rate']} = {improvement}",
+        f"{column['performance_score']} = {score}",
+    ]
+
+    placeholders = "(" + ", ".join(["%s"] * len(INSERT_FIELDS)) + ")"
+    return (
+        f"INSERT INTO {table} ({', '.join(column[f] for f in INSERT_FIELDS)}) "
+        f"VALUES {', '.join([placeholders] * row_count)} "
+        f"ON CONFLICT ({column['user_id']}, {column['elective']}, {column['activity_name']}) "
+        f"DO UPDATE SET {', '.join(assignments)} "
+        # date_completed only equals date_updated on the row this statement inserted
+        f"RETURNING {column['id']}, {column['user_id']}, {column['elective']}, {column['activity_name']}, "
+        f"{column['performance_score']}, {column['date_completed']} = {column['date_updated']}"
+    )
+
+
+def _clean(row):
+    # to_python() raises django.core.exceptions.ValidationError on malformed input
+    return {f: FIELDS[f].to_python(row[f]) for f in INPUT_FIELDS}
+
+
+def _insert_params(values, now, db):
+    values = dict(values)
+    values.update({
+        'first_attempt_time': values['completion_time'],
+        'last_attempt_time': values['completion_time'],
+        'improvement_rate': 0,
+        'performance_score_version': PERFORMANCE_SCORE_VERSION,
+        'date_completed': now,
+        'date_updated': now,
+    })
+    # A first attempt has no improvement yet
+    values['performance_score'] = performance_score(
+        values['completed'], values['engagement_score'], values['time_efficiency'], 0
+    )
+
+    return [FIELDS[f].get_db_prep_save(values[f], db) for f in INSERT_FIELDS]
+
+
+def _rounds(rows):
+    """
+    Split rows so no statement touches the same activity twice.
+
+    Round n holds the n-th submission for each (user, elective, activity);
+    running the rounds in order replays repeated submissions as retries.
+    """
+    rounds = []
+    seen = {}
+    for index, row in enumerate(rows):
+        key = (row['user_id'], row['elective'], row['activity_name'])
+        occurrence = seen.get(key, 0)
+        seen[key] = occurrence + 1
+        if occurrence == len(rounds):
+            rounds.append([])
+        rounds[occurrence].append(index)
+    return rounds
+
+
+def upsert_activity_results(rows):
+    """
+    Insert or update ActivityResult rows, one statement per batch.
+
+    `rows` are dicts with the INPUT_FIELDS keys. Rows for the same
+    (user_id, elective, activity_name) are applied in order, each as a
+    retry of the one before. Returns one dict per row, in input order, with
+    the row `id`, whether it was `created` and its new `performance_score`.
+
+    Each row is also logged as an ActivityAttempt, and
+    activities.signals.activity_results_changed is sent for the affected
+    users; the upserts, the log inserts and the signal receivers' writes run
+    in one transaction.
+    """
+    if not rows:
+        return []
+
+    rows = [_clean(row) for row in rows]
+    now = timezone.now()
+    # Resolve the connection once instead of through the per-access proxy
+    db = connections[DEFAULT_DB_ALIAS]
+    batch_size = max(1, min(
+        db.ops.bulk_batch_size(INSERT_FIELDS, rows),
+        MAX_QUERY_PARAMS // len(INSERT_FIELDS),
+    ))
+
+    results = [None] * len(rows)
+    attempts = []
+    with transaction.atomic(using=db.alias), db.cursor() as cursor:
+        for round_number, round_indexes in enumerate(_rounds(rows)):
+            for start in range(0, len(round_indexes), batch_size):
+                batch = round_indexes[start:start + batch_size]
+                params = [param for index in batch for param in _insert_params(rows[index], now, db)]
+                cursor.execute(_upsert_sql(db.vendor, len(batch)), params)
+
+                # RETURNING order is not guaranteed, so match rows back by key
+                positions = {
+                    (rows[index]['user_id'], rows[index]['elective'], rows[index]['activity_name']): index
+                    for index in batch
+                }
+                for activity_id, user_id, elective, activity_name, score, created in cursor.fetchall():
+                    index = positions[(user_id, elective, activity_name)]
+                    # SQLite returns a whole-number REAL expression as an integer
+                    score = float(score)
+                    results[index] = {
+                        'id': activity_id,
+                        # Later rounds share `now` with the insert, so only round 0 can create
+                        'created': bool(created) and round_number == 0,
+                        'performance_score': score,
+                    }
+                    attempts.append(ActivityAttempt(
+                        activity_result_id=activity_id,
+                        completion_time=rows[index]['completion_time'],
+                        completed=rows[index]['completed'],
+                        engagement_score=rows[index]['engagement_score'],
+                        time_efficiency=rows[index]['time_efficiency'],
+                        performance_score=score,
+                        attempted_at=now,
+                    ))
+
+        ActivityAttempt.objects.using(db.alias).bulk_create(attempts, batch_size=batch_size)
+        activity_results_changed.send(sender=ActivityResult, user_ids={row['user_id'] for row in rows})
+
+    return results
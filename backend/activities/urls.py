@@ -1,10 +1,14 @@
 from django.urls import path
 from .views import (
     ActivityResultView,
+    ActivityResultBatchView,
+    ActivityResultLookupView,
     ActivityAnalysisView
 )
 
 urlpatterns = [
     path("activity-result/", ActivityResultView.as_view(), name="activity-result"),
+    path("activity-result/lookup/", ActivityResultLookupView.as_view(), name="activity-result-lookup"),
+    path("activity-result/batch/", ActivityResultBatchView.as_view(), name="activity-result-batch"),
     path("activity-analysis/", ActivityAnalysisView.as_view(), name="activity-analysis"),
 ]
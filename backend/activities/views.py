@@ -2,15 +2,75 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Avg
-from django.contrib.auth.models import User
-from datetime import timedelta
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime, timedelta
+import binascii
+import json
+import math
 
-from .models import ActivityResult
+from core.conditional import conditional_get, user_data_etag
+from core.response_cache import response_cache
+
+from .models import ActivityResult, ActivityScoreRollup
+from .analytics import summarize_activities, peer_averages
+from .upsert import upsert_activity_results
+
+
+# Response field -> ActivityResult column for activity rows (and `fields=`)
+ACTIVITY_ROW_COLUMNS = {
+    'id': 'id',
+    'elective': 'elective',
+    'activity_name': 'activity_name',
+    'completion_time_seconds': 'completion_time',
+    'completed': 'completed',
+    'engagement_score': 'engagement_score',
+    'total_interactions': 'total_interactions',
+    'interaction_rate': 'interaction_rate',
+    'time_efficiency': 'time_efficiency',
+    'attempts': 'attempts',
+    'improvement_rate': 'improvement_rate',
+    'performance_score': 'performance_score',
+    'date_completed': 'date_completed',
+}
+
+ACTIVITY_PAGE_SIZE_MAX = 200
+
+
+def activity_result_rows(activities, fields=None):
+    """
+    Response rows for an ActivityResult queryset (shared with the dashboard).
+    
+    Only the columns behind `fields` (default: all row fields) are loaded.
+    """
+    fields = fields or list(ACTIVITY_ROW_COLUMNS)
+    activity_data = []
+    for values in activities.values_list(*[ACTIVITY_ROW_COLUMNS[field] for field in fields]):
+        row = dict(zip(fields, values))
+        if 'completion_time_seconds' in row:
+            row['completion_time_seconds'] = row['completion_time_seconds'].total_seconds()
+        activity_data.append(row)
+    return activity_data
+
+
+def encode_activity_cursor(date_completed, activity_id):
+    payload = json.dumps([date_completed.isoformat(), activity_id])
+    return urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_activity_cursor(cursor):
+    """(date_completed, id) of the last row of the previous page; ValueError if malformed"""
+    try:
+        date_completed, activity_id = json.loads(urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(date_completed), int(activity_id)
+    except (TypeError, ValueError, binascii.Error):
+        raise ValueError("Invalid cursor")
 
 
 class ActivityResultView(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = {'GET': 3, 'POST': 7}
     
     def post(self, request):
         """Save activity completion data with enhanced metrics"""
@@ -37,46 +97,13 @@ class ActivityResultView(APIView):
         # Convert seconds to timedelta
         completion_time = timedelta(seconds=completion_time_seconds)
         
-        # Get existing activity to track improvement
-        existing = ActivityResult.objects.filter(
-            user=user,
-            elective=elective,
-            activity_name=activity_name
-        ).first()
-        
-        # Calculate improvement if this is a retry
-        improvement_rate = 0
-        first_attempt_time = completion_time
-        last_attempt_time = completion_time
-        
-        if existing:
-            # This is a retry - calculate improvement
-            if existing.first_attempt_time:
-                first_attempt_time = existing.first_attempt_time
-            else:
-                first_attempt_time = existing.completion_time
-            
-            last_attempt_time = completion_time
-            
-            # Improvement = reduction in time or increase in engagement
-            time_improvement = 0
-            if existing.completion_time:
-                old_time = existing.completion_time.total_seconds()
-                new_time = completion_time.total_seconds()
-                if old_time > 0:
-                    time_improvement = ((old_time - new_time) / old_time) * 100
-            
-            engagement_improvement = max(0, engagement_score - existing.engagement_score)
-            improvement_rate = (time_improvement * 0.5) + (engagement_improvement * 0.5)
-        else:
-            first_attempt_time = completion_time
-        
-        # Create or update activity result
-        activity, created = ActivityResult.objects.update_or_create(
-            user=user,
-            elective=elective,
-            activity_name=activity_name,
-            defaults={
+        # Insert, or update the existing row and derive improvement from it,
+        # in a single atomic statement
+        try:
+            result, = upsert_activity_results([{
+                'user_id': user.id,
+                'elective': elective,
+                'activity_name': activity_name,
                 'completion_time': completion_time,
                 'completed': completed,
                 'engagement_score': engagement_score,
@@ -85,59 +112,248 @@ class ActivityResultView(APIView):
                 'time_efficiency': time_efficiency,
                 'quality_indicators': quality_indicators,
                 'attempts': attempts,
-                'first_attempt_time': first_attempt_time,
-                'last_attempt_time': last_attempt_time,
-                'improvement_rate': improvement_rate
-            }
-        )
+            }])
+        except ValidationError as exc:
+            return Response(
+                {"detail": " ".join(exc.messages)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         return Response({
             'message': 'Activity result saved',
-            'activity_id': activity.id,
-            'performance_score': activity.calculate_performance_score()
-        }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+            'activity_id': result['id'],
+            'performance_score': result['performance_score']
+        }, status=status.HTTP_201_CREATED if result['created'] else status.HTTP_200_OK)
     
+    @conditional_get(user_data_etag)
     def get(self, request):
         """Get user's activity results"""
         user = request.user
-        activities = ActivityResult.objects.filter(user=user).order_by('-date_completed')
-        
-        activity_data = []
-        for activity in activities:
-            activity_data.append({
-                'id': activity.id,
-                'elective': activity.elective,
-                'activity_name': activity.activity_name,
-                'completion_time_seconds': activity.completion_time.total_seconds(),
-                'completed': activity.completed,
-                'engagement_score': activity.engagement_score,
-                'total_interactions': activity.total_interactions,
-                'interaction_rate': activity.interaction_rate,
-                'time_efficiency': activity.time_efficiency,
-                'attempts': activity.attempts,
-                'improvement_rate': activity.improvement_rate,
-                'performance_score': activity.calculate_performance_score(),
-                'date_completed': activity.date_completed
-            })
-        
-        return Response(activity_data, status=status.HTTP_200_OK)
+        activities = ActivityResult.objects.filter(user=user).order_by('-date_completed', '-id')
+        
+        # Optional sparse fieldset: ?fields=elective,activity_name,completed
+        fields = None
+        if request.query_params.get('fields'):
+            fields = [field.strip() for field in request.query_params['fields'].split(',') if field.strip()]
+            unknown = [field for field in fields if field not in ACTIVITY_ROW_COLUMNS]
+            if unknown:
+                return Response(
+                    {"detail": f"Unknown fields: {', '.join(unknown)}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        # Without limit/cursor the full list is returned, as before
+        if 'limit' not in request.query_params and 'cursor' not in request.query_params:
+            activity_data = activity_result_rows(activities, fields)
+            return Response(activity_data, status=status.HTTP_200_OK)
+        
+        # Keyset pagination on (date_completed, id), newest first
+        try:
+            limit = int(request.query_params.get('limit', ACTIVITY_PAGE_SIZE_MAX))
+            if request.query_params.get('cursor'):
+                date_completed, activity_id = decode_activity_cursor(request.query_params['cursor'])
+                activities = activities.filter(
+                    Q(date_completed__lt=date_completed) | Q(date_completed=date_completed, id__lt=activity_id)
+                )
+        except ValueError:
+            return Response(
+                {"detail": "limit must be an integer and cursor a value returned as next_cursor"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = max(1, min(limit, ACTIVITY_PAGE_SIZE_MAX))
+        
+        # The cursor columns are always loaded, then dropped if not requested
+        requested = fields or list(ACTIVITY_ROW_COLUMNS)
+        page_fields = list(dict.fromkeys(requested + ['date_completed', 'id']))
+        rows = activity_result_rows(activities[:limit + 1], page_fields)
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_activity_cursor(rows[-1]['date_completed'], rows[-1]['id'])
+        
+        return Response({
+            'results': [{field: row[field] for field in requested} for row in rows],
+            'next_cursor': next_cursor,
+        }, status=status.HTTP_200_OK)
+
+
+class ActivityResultLookupView(APIView):
+    """Completion state of one activity (a single unique-index lookup)"""
+    permission_classes = [IsAuthenticated]
+    query_budget = 2
+    
+    def get(self, request):
+        elective = request.query_params.get('elective')
+        activity_name = request.query_params.get('activity_name')
+        if not elective or not activity_name:
+            return Response(
+                {"detail": "elective and activity_name are required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # (user, elective, activity_name) is covered by the unique_together index
+        activity = ActivityResult.objects.filter(
+            user=request.user, elective=elective, activity_name=activity_name
+        ).order_by().values('id', 'completed', 'attempts').first()
+        
+        return Response({
+            'elective': elective,
+            'activity_name': activity_name,
+            'exists': activity is not None,
+            'activity_id': activity['id'] if activity else None,
+            'completed': activity['completed'] if activity else False,
+            'attempts': activity['attempts'] if activity else 0,
+        }, status=status.HTTP_200_OK)
+
+
+# Optional submission fields and their defaults (same as ActivityResultView.post)
+SUBMISSION_NUMBER_FIELDS = {
+    'engagement_score': 0,
+    'total_interactions': 0,
+    'interaction_rate': 0,
+    'time_efficiency': 0,
+    'attempts': 1,
+}
+
+# Bounds of the columns the values are stored in: IntegerField is 32-bit on
+# PostgreSQL, and SQLite stores durations as 64-bit integer microseconds
+SUBMISSION_INTEGER_FIELDS = ('total_interactions', 'attempts')
+INTEGER_RANGE = (-2 ** 31, 2 ** 31 - 1)
+MAX_COMPLETION_SECONDS = (2 ** 63 - 1) // 10 ** 6
+
+
+def parse_activity_submission(item):
+    """
+    Validate one submitted activity result without a serializer round trip.
+    
+    Returns (row, errors): upsert row values (without user_id) and a dict of
+    field errors, exactly one of which is None.
+    """
+    if not isinstance(item, dict):
+        return None, {'non_field_errors': ['Expected an object']}
+    
+    errors = {}
+    row = {}
+    for field, max_length in (('elective', 50), ('activity_name', 100)):
+        value = item.get(field)
+        if not value or not isinstance(value, str):
+            errors[field] = ['This field is required.']
+        elif len(value) > max_length:
+            errors[field] = [f'Ensure this field has no more than {max_length} characters.']
+        else:
+            row[field] = value
+    
+    seconds = item.get('completion_time_seconds')
+    if isinstance(seconds, bool) or not isinstance(seconds, (int, float)) or not seconds >= 0:
+        errors['completion_time_seconds'] = ['A non-negative number is required.']
+    elif seconds > MAX_COMPLETION_SECONDS:
+        errors['completion_time_seconds'] = ['Ensure this value is a realistic duration.']
+    else:
+        row['completion_time'] = timedelta(seconds=seconds)
+    
+    for field, default in SUBMISSION_NUMBER_FIELDS.items():
+        value = item.get(field, default)
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or (
+            isinstance(value, float) and not math.isfinite(value)
+        ):
+            errors[field] = ['A valid number is required.']
+        elif field in SUBMISSION_INTEGER_FIELDS and not INTEGER_RANGE[0] <= value <= INTEGER_RANGE[1]:
+            errors[field] = [f'Ensure this value is between {INTEGER_RANGE[0]} and {INTEGER_RANGE[1]}.']
+        else:
+            row[field] = value
+    
+    quality_indicators = item.get('quality_indicators', {})
+    if not isinstance(quality_indicators, dict):
+        errors['quality_indicators'] = ['Expected an object.']
+    row['quality_indicators'] = quality_indicators
+    
+    completed = item.get('completed', True)
+    if not isinstance(completed, bool):
+        errors['completed'] = ['Must be a valid boolean.']
+    row['completed'] = completed
+    
+    if errors:
+        return None, errors
+    return row, None
+
+
+class ActivityResultBatchView(APIView):
+    """Save many activity results (e.g. replayed offline sessions) in one request"""
+    permission_classes = [IsAuthenticated]
+    
+    max_batch_size = 10000
+    
+    def post(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            return Response(
+                {"detail": "Expected a list of activity results"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > self.max_batch_size:
+            return Response(
+                {"detail": f"At most {self.max_batch_size} activity results per batch"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        user = request.user
+        results = [None] * len(items)
+        rows = []
+        row_indexes = []
+        
+        # Validate every item first; invalid items are reported, valid ones saved
+        for index, item in enumerate(items):
+            row, errors = parse_activity_submission(item)
+            if errors:
+                results[index] = {'index': index, 'status': 'invalid', 'errors': errors}
+                continue
+            
+            row['user_id'] = user.id
+            rows.append(row)
+            row_indexes.append(index)
+        
+        # Upsert all valid items together; repeats of one activity apply as retries in order
+        saved = upsert_activity_results(rows)
+        
+        for index, result in zip(row_indexes, saved):
+            results[index] = {
+                'index': index,
+                'status': 'created' if result['created'] else 'updated',
+                'activity_id': result['id'],
+                'performance_score': result['performance_score'],
+            }
+        
+        return Response({
+            'saved': len(rows),
+            'invalid': len(items) - len(rows),
+            'results': results,
+        }, status=status.HTTP_200_OK)
 
 
 class ActivityAnalysisView(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 6
     
+    @conditional_get()  # Body comes from the response cache and peer statistics
     def get(self, request):
         """Analyze how students finish activities - comprehensive performance analysis"""
         user = request.user
+        analysis_data = response_cache.get_or_compute('activity-analysis', user.id, lambda: self.build_analysis(user))
+        return Response(analysis_data, status=status.HTTP_200_OK)
+    
+    def build_analysis(self, user):
+        """Response payload; a pure function of the user's rows and the peer statistics"""
+        # Aggregate all of the user's completed activities in a single query
+        summary = summarize_activities(
+            ActivityResult.objects.filter(user=user, completed=True)
+        )
         
-        # Get all user's activity results
-        user_activities = ActivityResult.objects.filter(user=user, completed=True)
-        
-        if not user_activities.exists():
-            return Response({
+        if summary is None:
+            return {
                 'message': 'No completed activities found',
                 'analysis': {}
-            }, status=status.HTTP_200_OK)
+            }
         
         # Initialize analysis structure
         analysis = {
@@ -150,23 +366,12 @@ class ActivityAnalysisView(APIView):
         # ============================================================================
         # OVERALL ANALYSIS
         # ============================================================================
-        total_activities = user_activities.count()
-        avg_completion_time = user_activities.aggregate(
-            Avg('completion_time')
-        )['completion_time__avg']
-        avg_engagement = user_activities.aggregate(
-            Avg('engagement_score')
-        )['engagement_score__avg'] or 0
-        avg_time_efficiency = user_activities.aggregate(
-            Avg('time_efficiency')
-        )['time_efficiency__avg'] or 0
-        avg_performance = user_activities.aggregate(
-            Avg('total_interactions')
-        )['total_interactions__avg'] or 0
-        
-        # Calculate overall performance score
-        overall_performance_scores = [a.calculate_performance_score() for a in user_activities]
-        avg_performance_score = sum(overall_performance_scores) / len(overall_performance_scores) if overall_performance_scores else 0
+        total_activities = summary['total']
+        avg_completion_time = summary['avg_completion_time']
+        avg_engagement = summary['avg_engagement'] or 0
+        avg_time_efficiency = summary['avg_time_efficiency'] or 0
+        avg_performance = summary['avg_interactions'] or 0
+        avg_performance_score = summary['avg_score'] or 0
         
         analysis['overall'] = {
             'total_activities_completed': total_activities,
@@ -181,40 +386,29 @@ class ActivityAnalysisView(APIView):
         # ============================================================================
         # ANALYSIS BY ELECTIVE
         # ============================================================================
-        for elective in ['MobileDev', 'ITBA', 'MMGD']:
-            elective_activities = user_activities.filter(elective=elective)
+        for elective, _ in ActivityResult.ELECTIVE_CHOICES:
+            elective_summary = summary['by_elective'].get(elective)
             
-            if elective_activities.exists():
-                elective_avg_time = elective_activities.aggregate(
-                    Avg('completion_time')
-                )['completion_time__avg']
-                elective_avg_engagement = elective_activities.aggregate(
-                    Avg('engagement_score')
-                )['engagement_score__avg'] or 0
-                elective_avg_efficiency = elective_activities.aggregate(
-                    Avg('time_efficiency')
-                )['time_efficiency__avg'] or 0
-                
-                elective_performance_scores = [a.calculate_performance_score() for a in elective_activities]
-                elective_avg_performance = sum(elective_performance_scores) / len(elective_performance_scores) if elective_performance_scores else 0
+            if elective_summary:
+                elective_avg_time = elective_summary['avg_completion_time']
+                elective_avg_engagement = elective_summary['avg_engagement'] or 0
+                elective_avg_efficiency = elective_summary['avg_time_efficiency'] or 0
+                elective_avg_performance = elective_summary['avg_score'] or 0
                 
                 # Calculate improvement trend
-                activities_ordered = elective_activities.order_by('date_completed')
-                if activities_ordered.count() >= 2:
-                    first_score = activities_ordered.first().calculate_performance_score()
-                    last_score = activities_ordered.last().calculate_performance_score()
-                    improvement_trend = last_score - first_score
+                if elective_summary['total'] >= 2:
+                    improvement_trend = elective_summary['last_score'] - elective_summary['first_score']
                 else:
                     improvement_trend = 0
                 
                 analysis['by_elective'][elective] = {
-                    'activities_completed': elective_activities.count(),
+                    'activities_completed': elective_summary['total'],
                     'average_completion_time_minutes': round(elective_avg_time.total_seconds() / 60, 2) if elective_avg_time else 0,
                     'average_engagement_score': round(elective_avg_engagement, 2),
                     'average_time_efficiency': round(elective_avg_efficiency, 2),
                     'average_performance_score': round(elective_avg_performance, 2),
                     'improvement_trend': round(improvement_trend, 2),
-                    'completion_rate': round((elective_activities.count() / 3) * 100, 2)  # 3 activities per elective
+                    'completion_rate': round((elective_summary['total'] / 3) * 100, 2)  # 3 activities per elective
                 }
             else:
                 analysis['by_elective'][elective] = {
@@ -227,25 +421,23 @@ class ActivityAnalysisView(APIView):
         # TREND ANALYSIS
         # ============================================================================
         # Analyze performance over time
-        activities_by_date = user_activities.order_by('date_completed')
-        
-        if activities_by_date.count() >= 2:
-            first_activity = activities_by_date.first()
-            last_activity = activities_by_date.last()
+        if total_activities >= 2:
+            first_activity = summary['first']
+            last_activity = summary['last']
             
-            time_span_days = (last_activity.date_completed - first_activity.date_completed).days or 1
+            time_span_days = (last_activity['date_completed'] - first_activity['date_completed']).days or 1
             
             analysis['trends'] = {
-                'first_activity_date': first_activity.date_completed.isoformat(),
-                'last_activity_date': last_activity.date_completed.isoformat(),
+                'first_activity_date': first_activity['date_completed'].isoformat(),
+                'last_activity_date': last_activity['date_completed'].isoformat(),
                 'time_span_days': time_span_days,
                 'activities_per_day': round(total_activities / time_span_days, 2) if time_span_days > 0 else total_activities,
                 'performance_improvement': round(
-                    last_activity.calculate_performance_score() - first_activity.calculate_performance_score(),
+                    last_activity['score'] - first_activity['score'],
                     2
                 ),
                 'engagement_trend': round(
-                    last_activity.engagement_score - first_activity.engagement_score,
+                    last_activity['engagement_score'] - first_activity['engagement_score'],
                     2
                 )
             }
@@ -254,18 +446,12 @@ class ActivityAnalysisView(APIView):
         # COMPARISON WITH PEERS
         # ============================================================================
         # Compare user's performance with average of all users
-        all_activities = ActivityResult.objects.filter(completed=True)
-        
-        if all_activities.exists():
-            peer_avg_engagement = all_activities.aggregate(
-                Avg('engagement_score')
-            )['engagement_score__avg'] or 0
-            peer_avg_time = all_activities.aggregate(
-                Avg('completion_time')
-            )['completion_time__avg']
-            peer_avg_efficiency = all_activities.aggregate(
-                Avg('time_efficiency')
-            )['time_efficiency__avg'] or 0
+        peers = peer_averages()
+        
+        if peers['total']:
+            peer_avg_engagement = peers['avg_engagement'] or 0
+            peer_avg_time = peers['avg_completion_time']
+            peer_avg_efficiency = peers['avg_time_efficiency'] or 0
             
             analysis['comparison'] = {
                 'engagement_vs_peer': round(avg_engagement - peer_avg_engagement, 2),
@@ -305,27 +491,17 @@ class ActivityAnalysisView(APIView):
         
         analysis['insights'] = insights
         
-        return Response({
+        return {
             'user_id': user.id,
             'username': user.username,
             'analysis': analysis
-        }, status=status.HTTP_200_OK)
+        }
     
     def _calculate_percentile(self, user, user_score):
-        """Calculate user's performance percentile"""
-        all_users = User.objects.filter(activity_results__completed=True).distinct()
-        
-        user_scores = []
-        for u in all_users:
-            activities = ActivityResult.objects.filter(user=u, completed=True)
-            if activities.exists():
-                scores = [a.calculate_performance_score() for a in activities]
-                avg_score = sum(scores) / len(scores) if scores else 0
-                user_scores.append(avg_score)
-        
-        if not user_scores:
+        """Calculate user's performance percentile from the maintained score rollups"""
+        percentile = ActivityScoreRollup.percentile_of(user_score, user_id=user.id)
+        
+        if percentile is None:
             return 50  # Default to median if no data
         
-        user_scores.sort()
-        percentile = (sum(1 for score in user_scores if score < user_score) / len(user_scores)) * 100
         return round(percentile, 2)
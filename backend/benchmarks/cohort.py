@@ -0,0 +1,169 @@
+"""
+Synthetic student cohort for benchmarks.
+
+Each generated student gets a User (all sharing one password), a
+UserProfile, a SurveyResult and up to 9 ActivityResult rows (the 3
+activities of each elective). Students are more likely to do the
+activities of the elective their survey recommended. Every activity also
+gets its ActivityAttempt row, and every student with completed activities
+gets an ActivityScoreRollup.
+
+Students are numbered, and student i's data depends only on (seed, i).
+generate_cohort(0, 1000) followed by generate_cohort(1000, 10000)
+therefore produces exactly the same 10k students as generate_cohort(0, 10000).
+
+Import after Django is set up (see benchmarks/run.py).
+"""
+import math
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from accounts.models import UserProfile
+from activities.models import (
+    ActivityAttempt, ActivityResult, ActivityScoreRollup, PERFORMANCE_SCORE_VERSION, performance_score,
+)
+from survey.models import SurveyResult
+
+PASSWORD = 'benchmark-password'
+
+ACTIVITIES = {
+    'MobileDev': ['Design a Login Screen', 'Create an App Icon', 'Plan an App Flow'],
+    'ITBA': ['Read the Sales Report', 'Find the Problem', 'Build a Simple Chart'],
+    'MMGD': ['Design a Game Character', 'Create a Game Level', 'Edit a Photo'],
+}
+
+TRAITS = ['R', 'I', 'A', 'S', 'E', 'C']
+
+# Chance of doing each activity of the recommended elective / of the others
+RECOMMENDED_ACTIVITY_RATE = 0.75
+OTHER_ACTIVITY_RATE = 0.3
+
+# Students created per transaction and bulk_create batch
+CHUNK_SIZE = 2000
+
+
+def username(index):
+    return f'student{index:06d}'
+
+
+def _bounded(value, low, high):
+    return max(low, min(high, value))
+
+
+def _survey(rnd, user):
+    trait_scores = {trait: round(_bounded(rnd.gauss(15, 5), 0, 30), 2) for trait in TRAITS}
+    elective_scores = {elective: round(rnd.uniform(20, 100), 1) for elective in ACTIVITIES}
+    total_xp = int(rnd.triangular(200, 1500, 600))
+    return SurveyResult(
+        user=user,
+        selected_elective=max(elective_scores, key=elective_scores.get),
+        trait_scores=trait_scores,
+        elective_scores=elective_scores,
+        total_xp=total_xp,
+        level=1 + total_xp // 250,
+        # Log-normal around 6 minutes, like real survey durations
+        completion_time=timedelta(seconds=_bounded(rnd.lognormvariate(math.log(360), 0.45), 60, 1800)),
+        questions_answered=30,
+    )
+
+
+def _activity(rnd, user, elective, activity_name):
+    completed = rnd.random() < 0.85
+    engagement_score = round(rnd.betavariate(5, 2) * 100, 2)
+    time_efficiency = round(rnd.betavariate(4, 2) * 100, 2)
+    attempts = 1 + min(int(rnd.expovariate(1.5)), 4)
+    improvement_rate = round(rnd.uniform(-5, 25), 2) if attempts > 1 else 0
+    seconds = _bounded(rnd.lognormvariate(math.log(240), 0.6), 20, 3600)
+    total_interactions = int(seconds / 60 * rnd.uniform(2, 12))
+    completion_time = timedelta(seconds=seconds)
+    return ActivityResult(
+        user=user,
+        elective=elective,
+        activity_name=activity_name,
+        completion_time=completion_time,
+        completed=completed,
+        engagement_score=engagement_score,
+        total_interactions=total_interactions,
+        interaction_rate=round(total_interactions / (seconds / 60), 2),
+        time_efficiency=time_efficiency,
+        quality_indicators={'hints_used': rnd.randint(0, 3), 'errors': rnd.randint(0, 5)},
+        attempts=attempts,
+        first_attempt_time=completion_time * (1 + improvement_rate / 100),
+        last_attempt_time=completion_time,
+        improvement_rate=improvement_rate,
+        performance_score=performance_score(completed, engagement_score, time_efficiency, improvement_rate),
+        performance_score_version=PERFORMANCE_SCORE_VERSION,
+    )
+
+
+def _student(seed, index, password_hash):
+    rnd = random.Random(f'{seed}:{index}')
+    user = User(username=username(index), password=password_hash)
+    profile = UserProfile(
+        user=user, gender=rnd.choice(['male', 'female']), full_name=f'Student {index}'
+    )
+    survey = _survey(rnd, user)
+    activities = [
+        _activity(rnd, user, elective, activity_name)
+        for elective, names in ACTIVITIES.items()
+        for activity_name in names
+        if rnd.random() < (RECOMMENDED_ACTIVITY_RATE if elective == survey.selected_elective else OTHER_ACTIVITY_RATE)
+    ]
+    return user, profile, survey, activities
+
+
+def generate_cohort(start, stop, seed=0, progress=None):
+    """Create students number start..stop-1; returns the number of activity rows created"""
+    # One hash for everyone: hashing per user would dominate generation time
+    password_hash = make_password(PASSWORD)
+    activity_count = 0
+
+    for chunk_start in range(start, stop, CHUNK_SIZE):
+        students = [
+            _student(seed, index, password_hash)
+            for index in range(chunk_start, min(chunk_start + CHUNK_SIZE, stop))
+        ]
+        with transaction.atomic():
+            User.objects.bulk_create([user for user, _, _, _ in students])
+            # bulk_create sets primary keys on SQLite and PostgreSQL; re-point the children at them
+            for user, profile, survey, student_activities in students:
+                profile.user = survey.user = user
+                for activity in student_activities:
+                    activity.user = user
+
+            UserProfile.objects.bulk_create([profile for _, profile, _, _ in students])
+            SurveyResult.objects.bulk_create([survey for _, _, survey, _ in students])
+            activities = ActivityResult.objects.bulk_create(
+                [activity for _, _, _, student_activities in students for activity in student_activities],
+                batch_size=1000,
+            )
+            ActivityAttempt.objects.bulk_create([
+                ActivityAttempt(
+                    activity_result=activity,
+                    completion_time=activity.completion_time,
+                    completed=activity.completed,
+                    engagement_score=activity.engagement_score,
+                    time_efficiency=activity.time_efficiency,
+                    performance_score=activity.performance_score,
+                )
+                for activity in activities
+            ], batch_size=1000)
+
+            rollups = []
+            for user, _, _, student_activities in students:
+                scores = [activity.performance_score for activity in student_activities if activity.completed]
+                if scores:
+                    rollups.append(ActivityScoreRollup(
+                        user=user, completed_count=len(scores), average_score=sum(scores) / len(scores)
+                    ))
+            ActivityScoreRollup.objects.bulk_create(rollups)
+
+        activity_count += len(activities)
+        if progress:
+            progress(min(chunk_start + CHUNK_SIZE, stop))
+
+    return activity_count
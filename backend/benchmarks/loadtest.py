@@ -0,0 +1,421 @@
+"""
+Concurrent load test with scripted student sessions.
+
+Replays what a class does at the start of a lab: every virtual student
+logs in, submits the survey, submits several activities, then opens the
+dashboard (and polls it once more with its ETag). Stages run at rising
+concurrency, and each stage reports throughput, error rate and latency
+percentiles per endpoint.
+
+Pure Python: asyncio with a minimal HTTP/1.1 client (keep-alive when the
+server allows it, Content-Length or chunked bodies). Run it against a
+server you started yourself, or let it start gunicorn:
+
+    cd backend
+    python benchmarks/loadtest.py --serve wsgi --workers 3 --concurrency 10 50 100 200
+    python benchmarks/loadtest.py --url http://127.0.0.1:8000 --concurrency 25 50
+
+`--serve asgi` runs core.asgi under gunicorn's uvicorn worker (needs
+uvicorn). The students (`loadtest-<run>-<n>`, as many as all stages
+together, since no stage reuses another's) are registered through
+/api/register/ before the first stage and stay in the server's database,
+so point DATABASE_URL at a scratch database.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PERCENTILES = (50, 90, 95, 99)
+
+# Methods retried after a dropped keep-alive connection (RFC 9110 9.2.2)
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+ACTIVITIES = {
+    'MobileDev': ['Design a Login Screen', 'Create an App Icon', 'Plan an App Flow'],
+    'ITBA': ['Read the Sales Report', 'Find the Problem', 'Build a Simple Chart'],
+    'MMGD': ['Design a Game Character', 'Create a Game Level', 'Edit a Photo'],
+}
+
+PASSWORD = 'loadtest-password-1'
+
+
+class HTTPError(Exception):
+    pass
+
+
+# --------------------------------------------------
+# HTTP CLIENT
+# --------------------------------------------------
+
+class Connection:
+    """One HTTP/1.1 connection, reopened whenever the server closes it"""
+
+    def __init__(self, host, port, timeout):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, body=None, headers=None):
+        payload = json.dumps(body).encode() if body is not None else b''
+        lines = [
+            f"{method} {path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            "Accept: application/json",
+            f"Content-Length: {len(payload)}",
+        ]
+        if body is not None:
+            lines.append("Content-Type: application/json")
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        message = ("\r\n".join(lines) + "\r\n\r\n").encode() + payload
+
+        reused = self.writer is not None
+        try:
+            return await asyncio.wait_for(self._exchange(message), self.timeout)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.close()
+            # The server may have dropped an idle keep-alive connection: retry once on a
+            # fresh one, but only when repeating the request is harmless. A POST may have
+            # been processed already, so its failure is reported like any other error.
+            if not reused or method not in IDEMPOTENT_METHODS:
+                raise
+            return await asyncio.wait_for(self._exchange(message), self.timeout)
+        except BaseException:
+            self.close()
+            raise
+
+    async def _exchange(self, message):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write(message)
+        await self.writer.drain()
+
+        status_line = await self.reader.readuntil(b"\r\n")
+        parts = status_line.decode('latin-1').split(' ', 2)
+        if len(parts) < 2 or not parts[1].isdigit():
+            raise HTTPError(f"Malformed status line: {status_line!r}")
+        status = int(parts[1])
+
+        headers = {}
+        while True:
+            line = await self.reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = b''
+            while True:
+                size = int((await self.reader.readuntil(b"\r\n")).split(b';')[0], 16)
+                if size == 0:
+                    await self.reader.readuntil(b"\r\n")
+                    break
+                chunk = await self.reader.readexactly(size + 2)
+                body += chunk[:-2]
+        elif 'content-length' in headers:
+            body = await self.reader.readexactly(int(headers['content-length']))
+        else:
+            body = await self.reader.read()
+            headers['connection'] = 'close'
+
+        if headers.get('connection', '').lower() == 'close' or parts[0] == 'HTTP/1.0':
+            self.close()
+        return status, headers, body
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+# --------------------------------------------------
+# SESSIONS
+# --------------------------------------------------
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)  # endpoint -> [(latency seconds, status or error name)]
+
+    async def call(self, endpoint, connection, method, path, body=None, headers=None):
+        started = time.perf_counter()
+        try:
+            status, response_headers, response_body = await connection.request(method, path, body, headers)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, HTTPError) as exc:
+            self.samples[endpoint].append((time.perf_counter() - started, type(exc).__name__))
+            return None, {}, None
+        self.samples[endpoint].append((time.perf_counter() - started, status))
+        try:
+            data = json.loads(response_body) if response_body else None
+        except ValueError:
+            data = None
+        return status, response_headers, data
+
+
+def survey_payload(rnd):
+    elective_scores = {elective: round(rnd.uniform(20, 100), 1) for elective in ACTIVITIES}
+    return {
+        'selected_elective': max(elective_scores, key=elective_scores.get),
+        'trait_scores': {trait: round(rnd.uniform(5, 30), 1) for trait in 'RIASEC'},
+        'elective_scores': elective_scores,
+        'total_xp': rnd.randint(200, 1500),
+        'level': rnd.randint(1, 6),
+        'completion_time': f"00:{rnd.randint(2, 15):02d}:{rnd.randint(0, 59):02d}",
+        'questions_answered': 30,
+    }
+
+
+def activity_payload(rnd, elective, activity_name):
+    return {
+        'elective': elective,
+        'activity_name': activity_name,
+        'completion_time_seconds': round(rnd.lognormvariate(5.5, 0.5), 1),
+        'completed': rnd.random() < 0.85,
+        'engagement_score': round(rnd.uniform(30, 100), 1),
+        'total_interactions': rnd.randint(3, 80),
+        'time_efficiency': round(rnd.uniform(30, 100), 1),
+    }
+
+
+async def student_session(args, recorder, username, rnd):
+    """Login, survey, repeated activity submissions, then dashboard reads"""
+    async def think():
+        if args.think_time:
+            await asyncio.sleep(rnd.expovariate(1 / args.think_time))
+
+    connection = Connection(args.host, args.port, args.timeout)
+    try:
+        status, _, data = await recorder.call(
+            'POST /api/login/', connection, 'POST', '/api/login/',
+            {'username': username, 'password': PASSWORD}
+        )
+        if status != 200 or not data or 'access' not in data:
+            return
+        auth = {'Authorization': f"Bearer {data['access']}"}
+        await think()
+
+        survey = survey_payload(rnd)
+        await recorder.call('POST /api/survey-result/', connection, 'POST', '/api/survey-result/', survey, auth)
+        await think()
+
+        # Mostly activities of the recommended elective, like real students
+        names = list(ACTIVITIES[survey['selected_elective']])
+        names += rnd.sample([name for elective, other in ACTIVITIES.items() for name in other
+                             if elective != survey['selected_elective']], 2)
+        electives = {name: elective for elective, other in ACTIVITIES.items() for name in other}
+        for _ in range(args.activities):
+            name = rnd.choice(names)
+            await recorder.call(
+                'POST /api/activity-result/', connection, 'POST', '/api/activity-result/',
+                activity_payload(rnd, electives[name], name), auth
+            )
+            await think()
+
+        status, headers, _ = await recorder.call('GET /api/dashboard/', connection, 'GET', '/api/dashboard/', None, auth)
+        if status == 200 and 'etag' in headers:
+            await think()
+            await recorder.call(
+                'GET /api/dashboard/ (revalidate)', connection, 'GET', '/api/dashboard/', None,
+                {**auth, 'If-None-Match': headers['etag']}
+            )
+    finally:
+        connection.close()
+
+
+async def register_students(args, usernames):
+    semaphore = asyncio.Semaphore(args.setup_concurrency)
+    failures = []
+
+    async def register(username):
+        async with semaphore:
+            connection = Connection(args.host, args.port, args.timeout)
+            try:
+                status, _, body = await connection.request(
+                    'POST', '/api/register/', {'username': username, 'password': PASSWORD, 'full_name': username}
+                )
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, HTTPError) as exc:
+                failures.append(f"{username}: {type(exc).__name__}")
+                return
+            finally:
+                connection.close()
+            if status != 201:
+                failures.append(f"{username}: HTTP {status} {body[:200]!r}")
+
+    await asyncio.gather(*(register(username) for username in usernames))
+    if failures:
+        raise SystemExit(f"Could not register {len(failures)} students, e.g. {failures[0]}")
+
+
+async def run_stage(args, usernames, seed):
+    """One session per student in `usernames`, all at once"""
+    recorder = Recorder()
+    concurrency = len(usernames)
+
+    async def delayed_session(index):
+        rnd = random.Random(f'{seed}:{concurrency}:{index}')
+        if args.spread:
+            await asyncio.sleep(rnd.uniform(0, args.spread))
+        await student_session(args, recorder, usernames[index], rnd)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(delayed_session(index) for index in range(concurrency)))
+    return recorder, time.perf_counter() - started
+
+
+# --------------------------------------------------
+# REPORTING
+# --------------------------------------------------
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile"""
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(samples, duration):
+    latencies = sorted(latency * 1000 for latency, _ in samples)
+    outcomes = defaultdict(int)
+    for _, outcome in samples:
+        outcomes[str(outcome)] += 1
+    errors = sum(
+        count for outcome, count in outcomes.items()
+        if not outcome.isdigit() or int(outcome) >= 400
+    )
+    return {
+        'requests': len(samples),
+        'throughput_rps': round(len(samples) / duration, 2),
+        'errors': errors,
+        'error_rate': round(errors / len(samples), 4),
+        'latency_ms': {
+            **{f'p{pct}': round(percentile(latencies, pct), 2) for pct in PERCENTILES},
+            'mean': round(sum(latencies) / len(latencies), 2),
+            'max': round(latencies[-1], 2),
+        },
+        'outcomes': dict(sorted(outcomes.items())),
+    }
+
+
+def stage_report(recorder, duration):
+    endpoints = {endpoint: summarize(samples, duration) for endpoint, samples in recorder.samples.items()}
+    all_samples = [sample for samples in recorder.samples.values() for sample in samples]
+    return {
+        'duration_seconds': round(duration, 2),
+        'total': summarize(all_samples, duration) if all_samples else None,
+        'endpoints': endpoints,
+    }
+
+
+def print_stage(concurrency, report):
+    print(f"\nConcurrency {concurrency}: {report['duration_seconds']}s")
+    print(f"  {'endpoint':<34}{'req':>6}{'req/s':>9}{'err%':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  ms")
+    rows = list(report['endpoints'].items()) + ([('total', report['total'])] if report['total'] else [])
+    for endpoint, result in rows:
+        latency = result['latency_ms']
+        print(
+            f"  {endpoint:<34}{result['requests']:>6}{result['throughput_rps']:>9.1f}"
+            f"{result['error_rate'] * 100:>7.1f}{latency['p50']:>9.1f}{latency['p95']:>9.1f}"
+            f"{latency['p99']:>9.1f}{latency['max']:>9.1f}"
+        )
+
+
+# --------------------------------------------------
+# SERVER
+# --------------------------------------------------
+
+def start_server(args):
+    application = 'core.wsgi' if args.serve == 'wsgi' else 'core.asgi'
+    command = [
+        sys.executable, '-m', 'gunicorn', application,
+        '--bind', f'{args.host}:{args.port}', '--workers', str(args.workers), '--log-level', 'warning',
+    ]
+    if args.serve == 'asgi':
+        command += ['--worker-class', 'uvicorn.workers.UvicornWorker']
+    server = subprocess.Popen(command, cwd=BACKEND_DIR)
+
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"Server exited with status {server.returncode}")
+        try:
+            socket.create_connection((args.host, args.port), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit("Server did not start within 30 seconds")
+
+
+async def run(args):
+    seed = args.seed
+    run_id = datetime.now(timezone.utc).strftime('%m%d%H%M%S')
+    # Every stage gets students of its own, so each starts from a first login and an empty history
+    usernames = [f'loadtest-{run_id}-{index}' for index in range(sum(args.concurrency))]
+    print(f"Registering {len(usernames)} students...")
+    await register_students(args, usernames)
+
+    report = {
+        'url': args.url,
+        'serve': args.serve,
+        'workers': args.workers if args.serve else None,
+        'started': datetime.now(timezone.utc).isoformat(),
+        'activities_per_session': args.activities,
+        'think_time': args.think_time,
+        'spread': args.spread,
+        'stages': {},
+    }
+    offset = 0
+    for concurrency in args.concurrency:
+        recorder, duration = await run_stage(args, usernames[offset:offset + concurrency], seed)
+        offset += concurrency
+        report['stages'][str(concurrency)] = stage_report(recorder, duration)
+        print_stage(concurrency, report['stages'][str(concurrency)])
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help="Server to load (default: %(default)s)")
+    parser.add_argument('--serve', choices=['wsgi', 'asgi'], help="Start gunicorn on --url's port first")
+    parser.add_argument('--workers', type=int, default=3, help="gunicorn workers with --serve (default: 3)")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 50, 100],
+                        help="Simultaneous student sessions per stage")
+    parser.add_argument('--activities', type=int, default=5, help="Activity submissions per session")
+    parser.add_argument('--think-time', type=float, default=0.5, help="Mean pause between steps in seconds")
+    parser.add_argument('--spread', type=float, default=5, help="Sessions start at random within this many seconds")
+    parser.add_argument('--timeout', type=float, default=30, help="Per-request timeout in seconds")
+    parser.add_argument('--setup-concurrency', type=int, default=10, help="Parallel registrations before the test")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    url = urlsplit(args.url)
+    args.host, args.port = url.hostname, url.port or 80
+
+    server = start_server(args) if args.serve else None
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
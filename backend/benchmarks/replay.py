@@ -0,0 +1,251 @@
+"""
+Replay captured production traffic against a local instance.
+
+Captures come from core.traffic_capture (TRAFFIC_CAPTURE=True in
+production). Seed a local database with the benchmark cohort, start a
+server on it, then replay:
+
+    cd backend
+    python benchmarks/replay.py seed --users 2000
+    gunicorn core.wsgi --workers 3 &
+    python benchmarks/replay.py run logs/traffic.jsonl --speed 2
+
+Requests are re-issued open-loop at their captured offsets, divided by
+--speed (2 = twice as fast; 0 = as fast as possible). Bursts therefore
+reach the server as bursts. Each anonymous user key in the capture is
+mapped to its own seeded student, and the student's JWT is minted locally.
+Run both commands with the server's environment (DATABASE_URL,
+SECRET_KEY). Bodies are rebuilt from their captured shape: placeholders
+become random strings of the same length, and credentials become the
+student's.
+
+The report lists, per endpoint, the requests, error rate and latency
+percentiles. The captured production latency is shown next to them.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import string
+import sys
+import time
+from collections import defaultdict
+from urllib.parse import urlencode, urlsplit
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+from benchmarks.loadtest import Connection, Recorder, percentile, summarize  # noqa: E402
+
+
+def setup_django():
+    import django
+    django.setup()
+
+
+# --------------------------------------------------
+# SEED
+# --------------------------------------------------
+
+def seed(args):
+    setup_django()
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+
+    from benchmarks.cohort import generate_cohort
+
+    # A fresh database needs the survey migrations applied before activities'
+    call_command('migrate', 'survey', verbosity=0)
+    call_command('migrate', verbosity=0)
+
+    existing = User.objects.filter(username__startswith='student').count()
+    if existing >= args.users:
+        print(f"{existing} students already seeded.")
+        return
+    generate_cohort(
+        existing, args.users, seed=args.seed,
+        progress=lambda done: print(f"\r  generating students: {done}/{args.users}", end='', flush=True)
+    )
+    print(f"\nSeeded {args.users} students.")
+
+
+# --------------------------------------------------
+# REPLAY
+# --------------------------------------------------
+
+def read_capture(paths, limit=None):
+    entries = []
+    for path in paths:
+        with open(path, encoding='utf-8') as capture_file:
+            for line in capture_file:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+    entries.sort(key=lambda entry: entry['time'])
+    return entries[:limit] if limit else entries
+
+
+def _random_string(rnd, length):
+    return ''.join(rnd.choices(string.ascii_lowercase, k=length))
+
+
+def rebuild(value, rnd, credentials, key=None):
+    """A concrete value for a captured shape (see core.traffic_capture.shape)"""
+    if value == '<secret>':
+        return credentials.get(key, _random_string(rnd, 12))
+    if isinstance(value, dict):
+        if '<list>' in value:
+            return [rebuild(value['item'], rnd, credentials) for _ in range(value['<list>'])]
+        return {name: rebuild(item, rnd, credentials, name) for name, item in value.items()}
+    if isinstance(value, list):
+        return [rebuild(item, rnd, credentials) for item in value]
+    if isinstance(value, str) and value.startswith('<str:') and value.endswith('>'):
+        return _random_string(rnd, int(value[5:-1]))
+    return value
+
+
+class Students:
+    """Maps anonymous user keys of the capture to seeded students, minting their JWTs"""
+
+    def __init__(self):
+        from django.contrib.auth.models import User
+
+        from benchmarks.cohort import PASSWORD
+
+        self.password = PASSWORD
+        self.students = list(
+            User.objects.filter(username__startswith='student').order_by('id').values_list('id', 'username')
+        )
+        if not self.students:
+            raise SystemExit("No seeded students: run `replay.py seed` first")
+        self.assigned = {}
+        self.tokens = {}
+        self.registrations = 0
+
+    def student(self, user_key):
+        if user_key not in self.assigned:
+            self.assigned[user_key] = self.students[len(self.assigned) % len(self.students)]
+        return self.assigned[user_key]
+
+    def auth_headers(self, user_key):
+        from django.contrib.auth.models import User
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        if user_key is None:
+            return {}
+        user_id, _ = self.student(user_key)
+        if user_id not in self.tokens:
+            self.tokens[user_id] = str(AccessToken.for_user(User(pk=user_id)))
+        return {'Authorization': f'Bearer {self.tokens[user_id]}'}
+
+    def credentials(self, entry, rnd):
+        if entry['endpoint'].endswith('register/'):
+            # New accounts need names nobody has taken yet
+            self.registrations += 1
+            name = f'replay-{os.getpid()}-{self.registrations}'
+            return {'username': name, 'password': self.password, 'full_name': name}
+        # Logins go to some seeded student
+        _, username = self.students[rnd.randrange(len(self.students))]
+        return {'username': username, 'password': self.password}
+
+
+async def replay(args, entries, students):
+    recorder = Recorder()
+    rnd = random.Random(args.seed)
+    start = entries[0]['time']
+    tasks = []
+
+    async def issue(entry, body, headers):
+        query = {
+            key: value for key, value in entry['query'].items()
+            if not (isinstance(value, str) and value.startswith('<'))
+        }
+        path = entry['path'] + (f'?{urlencode(query)}' if query else '')
+        connection = Connection(args.host, args.port, args.timeout)
+        try:
+            await recorder.call(f"{entry['method']} {entry['endpoint']}", connection, entry['method'], path, body, headers)
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    for entry in entries:
+        if args.speed:
+            delay = (entry['time'] - start) / args.speed - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        body = None
+        if entry['body'] is not None and not (isinstance(entry['body'], str) and entry['body'].startswith('<')):
+            body = rebuild(entry['body'], rnd, students.credentials(entry, rnd))
+        tasks.append(asyncio.create_task(issue(entry, body, students.auth_headers(entry['user']))))
+
+    await asyncio.gather(*tasks)
+    return recorder, time.perf_counter() - started
+
+
+def report(entries, recorder, duration):
+    captured = defaultdict(list)
+    for entry in entries:
+        captured[f"{entry['method']} {entry['endpoint']}"].append(entry['duration_ms'])
+
+    results = {}
+    print(f"Replayed {len(entries)} requests in {duration:.1f}s")
+    print(f"  {'endpoint':<40}{'req':>6}{'req/s':>8}{'err%':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'captured p95':>14}  ms")
+    for endpoint, samples in sorted(recorder.samples.items()):
+        result = summarize(samples, duration)
+        result['captured_p95_ms'] = round(percentile(sorted(captured[endpoint]), 95), 2)
+        results[endpoint] = result
+        latency = result['latency_ms']
+        print(
+            f"  {endpoint:<40}{result['requests']:>6}{result['throughput_rps']:>8.1f}"
+            f"{result['error_rate'] * 100:>7.1f}{latency['p50']:>9.1f}{latency['p95']:>9.1f}"
+            f"{latency['p99']:>9.1f}{result['captured_p95_ms']:>14.1f}"
+        )
+    return {'requests': len(entries), 'duration_seconds': round(duration, 2), 'endpoints': results}
+
+
+def run(args):
+    setup_django()
+    entries = read_capture(args.capture, args.limit)
+    if not entries:
+        raise SystemExit("The capture is empty")
+    url = urlsplit(args.url)
+    args.host, args.port = url.hostname, url.port or 80
+
+    students = Students()
+    recorder, duration = asyncio.run(replay(args, entries, students))
+    result = report(entries, recorder, duration)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump({'capture': args.capture, 'speed': args.speed, **result}, output_file, indent=2)
+        print(f"Wrote {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed_parser = commands.add_parser('seed', help="Migrate the database and create benchmark students")
+    seed_parser.add_argument('--users', type=int, default=1000)
+    seed_parser.add_argument('--seed', type=int, default=0)
+
+    run_parser = commands.add_parser('run', help="Replay capture files against a server")
+    run_parser.add_argument('capture', nargs='+', help="Capture files (rotated files may be given together)")
+    run_parser.add_argument('--url', default='http://127.0.0.1:8000', help="Server to replay against (default: %(default)s)")
+    run_parser.add_argument('--speed', type=float, default=1.0, help="Time scale; 0 replays as fast as possible")
+    run_parser.add_argument('--limit', type=int, help="Replay only the first LIMIT requests")
+    run_parser.add_argument('--timeout', type=float, default=30, help="Per-request timeout in seconds")
+    run_parser.add_argument('--seed', type=int, default=0, help="Seed for rebuilt bodies")
+    run_parser.add_argument('--output', help="Write the report as JSON to this file")
+
+    args = parser.parse_args()
+    if args.command == 'seed':
+        seed(args)
+    else:
+        run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,278 @@
+"""
+Endpoint benchmarks against a synthetic cohort.
+
+Builds a throwaway database, fills it with benchmarks/cohort.py students
+and drives the main endpoints through the Django test client at each
+cohort size (growing the same cohort from one size to the next):
+
+    cd backend && python benchmarks/run.py --users 1000 10000 100000
+
+The endpoints are ActivityResultView GET and POST, ActivityAnalysisView,
+GenerateRecommendationView, LeaderboardView and login_user. Each request
+goes to a different random student, so per-user caches start cold; shared
+caches (leaderboard, peer averages) are cleared between sizes. Query
+counts and DB time come from the Server-Timing header of
+core.metrics.MetricsMiddleware.
+
+Results are written as JSON (latency percentiles in ms, query counts,
+status codes) with the git revision and environment, so runs can be
+compared over time:
+
+    python benchmarks/run.py --compare benchmarks/results/<earlier run>.json
+
+The database is a temporary SQLite file unless --database-url points at an
+empty PostgreSQL database. Tables are created straight from the models.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+SERVER_TIMING_DB = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def setup_django(database_url):
+    from django.conf import settings
+
+    if database_url:
+        import dj_database_url
+        settings.DATABASES['default'] = dj_database_url.parse(database_url)
+        database_file = None
+    else:
+        handle, database_file = tempfile.mkstemp(prefix='electipath-bench-', suffix='.sqlite3')
+        os.close(handle)
+        settings.DATABASES['default'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': database_file}
+    settings.SLOW_QUERY_LOG = {**getattr(settings, 'SLOW_QUERY_LOG', {}), 'ENABLED': False}
+
+    import django
+    django.setup()
+
+    from django.apps import apps
+    from django.core.management import call_command
+
+    # Build the schema from the current models rather than the migration history
+    settings.MIGRATION_MODULES = {config.label: None for config in apps.get_app_configs()}
+    call_command('migrate', run_syncdb=True, verbosity=0)
+    return database_file
+
+
+# --------------------------------------------------
+# ENDPOINTS
+# --------------------------------------------------
+
+def endpoints():
+    from benchmarks.cohort import ACTIVITIES, PASSWORD, username
+
+    def activity_post(rnd, index):
+        elective = rnd.choice(list(ACTIVITIES))
+        return {
+            'elective': elective,
+            'activity_name': rnd.choice(ACTIVITIES[elective]),
+            'completion_time_seconds': round(rnd.uniform(30, 600), 1),
+            'completed': True,
+            'engagement_score': round(rnd.uniform(40, 100), 1),
+            'total_interactions': rnd.randint(5, 60),
+            'time_efficiency': round(rnd.uniform(40, 100), 1),
+        }
+
+    # name -> (method, path, body builder or None, send a JWT)
+    return {
+        'activity-result GET': ('get', '/api/activity-result/', None, True),
+        'activity-result POST': ('post', '/api/activity-result/', activity_post, True),
+        'activity-analysis': ('get', '/api/activity-analysis/', None, True),
+        'recommendation': ('get', '/api/recommendation/', None, True),
+        'leaderboard': ('get', '/api/leaderboard/', None, True),
+        'login': ('post', '/api/login/', lambda rnd, index: {'username': username(index), 'password': PASSWORD}, False),
+    }
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile"""
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies, queries, db_times, statuses):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'latency_ms': {
+            **{f'p{pct}': round(percentile(latencies, pct), 3) for pct in PERCENTILES},
+            'mean': round(sum(latencies) / len(latencies), 3),
+            'max': round(latencies[-1], 3),
+        },
+        'queries': {
+            'min': min(queries),
+            'max': max(queries),
+            'mean': round(sum(queries) / len(queries), 2),
+        },
+        'db_ms_mean': round(sum(db_times) / len(db_times), 3),
+        'statuses': {str(code): statuses.count(code) for code in sorted(set(statuses))},
+    }
+
+
+def bench_endpoint(client, user_ids, spec, rnd, requests, warmup):
+    from django.contrib.auth.models import User
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    method, path, body, authenticated = spec
+    latencies, queries, db_times, statuses = [], [], [], []
+
+    for number in range(warmup + requests):
+        index = rnd.randrange(len(user_ids))
+        headers = {}
+        if authenticated:
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {AccessToken.for_user(User(pk=user_ids[index]))}'
+        kwargs = {'data': json.dumps(body(rnd, index)), 'content_type': 'application/json'} if body else {}
+
+        # login_user prints debug lines; keep them out of the report
+        with redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            response = getattr(client, method)(path, **headers, **kwargs)
+            elapsed = time.perf_counter() - started
+
+        if number < warmup:
+            continue
+        match = SERVER_TIMING_DB.search(response.get('Server-Timing', ''))
+        latencies.append(elapsed * 1000)
+        db_times.append(float(match.group(1)) if match else 0.0)
+        queries.append(int(match.group(2)) if match else 0)
+        statuses.append(response.status_code)
+
+    return summarize(latencies, queries, db_times, statuses)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous, current):
+    """Print p50/p95 latency and mean query count changes per size and endpoint"""
+    print(f"\nCompared with {previous['revision']} ({previous['started']}):")
+    for size, results in current['sizes'].items():
+        for name, result in results['endpoints'].items():
+            before = previous['sizes'].get(size, {}).get('endpoints', {}).get(name)
+            if before is None:
+                continue
+            changes = [
+                f"{key} {before['latency_ms'][key]:.1f} -> {result['latency_ms'][key]:.1f} ms "
+                f"({(result['latency_ms'][key] / before['latency_ms'][key] - 1) * 100:+.0f}%)"
+                for key in ('p50', 'p95')
+            ]
+            changes.append(f"queries {before['queries']['mean']} -> {result['queries']['mean']}")
+            print(f"  {size:>7} users  {name:<22} " + ", ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, nargs='+', default=[1000, 10000, 100000], help="Cohort sizes, ascending")
+    parser.add_argument('--requests', type=int, default=100, help="Measured requests per endpoint and size")
+    parser.add_argument('--warmup', type=int, default=5, help="Unmeasured requests before each endpoint")
+    parser.add_argument('--endpoints', nargs='+', help="Only these endpoint names")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--database-url', help="Empty database to use instead of a temporary SQLite file")
+    parser.add_argument('--output', help="Result file (default: benchmarks/results/<time>-<revision>.json)")
+    parser.add_argument('--compare', help="Earlier result file to compare with")
+    args = parser.parse_args()
+
+    database_file = setup_django(args.database_url)
+    try:
+        run(args)
+    finally:
+        if database_file:
+            from django.db import connections
+            connections.close_all()
+            os.remove(database_file)
+
+
+def run(args):
+    import django
+    from django.contrib.auth.models import User
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test import Client
+
+    from benchmarks.cohort import generate_cohort
+    from core.response_cache import response_cache
+
+    specs = endpoints()
+    if args.endpoints:
+        specs = {name: spec for name, spec in specs.items() if name in args.endpoints}
+
+    started = datetime.now(timezone.utc)
+    report = {
+        'revision': git_revision(),
+        'started': started.isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'seed': args.seed,
+        'requests': args.requests,
+        'warmup': args.warmup,
+        'sizes': {},
+    }
+
+    created = 0
+    for size in sorted(args.users):
+        generation_started = time.perf_counter()
+        generate_cohort(
+            created, size, seed=args.seed,
+            progress=lambda done: print(f"\r  generating students: {done}/{size}", end='', flush=True)
+        )
+        print()
+        generation_time = time.perf_counter() - generation_started
+        created = size
+
+        cache.clear()
+        response_cache.clear_local()
+        user_ids = list(User.objects.order_by('id').values_list('id', flat=True))
+        client = Client()
+        results = {}
+        for name, spec in specs.items():
+            # Same request sequence for every run with this seed
+            rnd = random.Random(f'{args.seed}:{size}:{name}')
+            results[name] = bench_endpoint(client, user_ids, spec, rnd, args.requests, args.warmup)
+            latency = results[name]['latency_ms']
+            print(
+                f"{size:>7} users  {name:<22} p50 {latency['p50']:8.2f}  p95 {latency['p95']:8.2f}  "
+                f"p99 {latency['p99']:8.2f} ms  queries {results[name]['queries']['mean']:>5}  "
+                f"{results[name]['statuses']}"
+            )
+        report['sizes'][str(size)] = {'generation_seconds': round(generation_time, 2), 'endpoints': results}
+
+    output = args.output or os.path.join(
+        BACKEND_DIR, 'benchmarks', 'results', f"{started:%Y%m%dT%H%M%SZ}-{report['revision'] or 'local'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as result_file:
+        json.dump(report, result_file, indent=2)
+    print(f"Wrote {output}")
+
+    if args.compare:
+        with open(args.compare) as previous_file:
+            compare(json.load(previous_file), report)
+
+
+if __name__ == '__main__':
+    main()
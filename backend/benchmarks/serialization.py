@@ -0,0 +1,125 @@
+"""
+Serialization cost of the activity list, per 1k rows.
+
+Compares the previous ActivityResultView.get path (model instances turned
+into dicts attribute by attribute, rendered by DRF's JSONRenderer) with the
+current one (values_list rows rendered by core.renderers.FastJSONRenderer).
+Runs against a throwaway in-memory SQLite database:
+
+    cd backend && python benchmarks/serialization.py --rows 10000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+from django.conf import settings  # noqa: E402
+
+settings.DATABASES['default'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from activities.models import ActivityResult  # noqa: E402
+from activities.views import activity_result_rows  # noqa: E402
+from core.renderers import FastJSONRenderer, orjson  # noqa: E402
+
+
+def create_rows(row_count):
+    with connection.schema_editor() as editor:
+        editor.create_model(User)
+        editor.create_model(ActivityResult)
+
+    user = User.objects.create(username='benchmark')
+    now = timezone.now()
+    ActivityResult.objects.bulk_create([
+        ActivityResult(
+            user=user,
+            elective=('MobileDev', 'ITBA', 'MMGD')[i % 3],
+            activity_name=f'activity_{i}',
+            completion_time=timedelta(seconds=30 + i % 600),
+            completed=i % 4 != 0,
+            engagement_score=i % 100,
+            total_interactions=i % 50,
+            interaction_rate=(i % 50) / 3,
+            time_efficiency=(i * 7) % 100,
+            quality_indicators={'hints': i % 5, 'errors': i % 3},
+            attempts=1 + i % 3,
+            improvement_rate=(i % 10) / 2,
+            performance_score=(i * 13) % 100,
+            date_completed=now - timedelta(minutes=i),
+        )
+        for i in range(row_count)
+    ], batch_size=1000)
+    return user
+
+
+def instance_rows(activities):
+    """Row building as ActivityResultView.get did it before values_list"""
+    activity_data = []
+    for activity in activities:
+        activity_data.append({
+            'id': activity.id,
+            'elective': activity.elective,
+            'activity_name': activity.activity_name,
+            'completion_time_seconds': activity.completion_time.total_seconds(),
+            'completed': activity.completed,
+            'engagement_score': activity.engagement_score,
+            'total_interactions': activity.total_interactions,
+            'interaction_rate': activity.interaction_rate,
+            'time_efficiency': activity.time_efficiency,
+            'attempts': activity.attempts,
+            'improvement_rate': activity.improvement_rate,
+            'performance_score': activity.performance_score,
+            'date_completed': activity.date_completed
+        })
+    return activity_data
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    user = create_rows(args.rows)
+    activities = ActivityResult.objects.filter(user=user).order_by('-date_completed', '-id')
+
+    paths = [
+        ('before: instances + JSONRenderer', lambda: instance_rows(activities.all()), JSONRenderer()),
+        ('after:  values_list + FastJSONRenderer', lambda: activity_result_rows(activities.all()), FastJSONRenderer()),
+    ]
+
+    per_1k = 1000 / args.rows * 1000
+    print(f"{args.rows} rows, best of {args.repeat}, ms per 1k rows (orjson {'on' if orjson else 'not installed'})")
+    print(f"{'path':<42}{'query+rows':>12}{'render':>10}{'total':>10}{'bytes':>12}")
+    for name, build, renderer in paths:
+        build_time, rows = best_of(args.repeat, build)
+        render_time, body = best_of(args.repeat, lambda: renderer.render(rows))
+        print(
+            f"{name:<42}{build_time * per_1k:>12.2f}{render_time * per_1k:>10.2f}"
+            f"{(build_time + render_time) * per_1k:>10.2f}{len(body):>12}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Shared cache for results that are the same for every user.
+
+Entries are kept in Django's default cache with a soft TTL
+(settings.SHARED_CACHE_TTL). When an entry goes stale, the first caller to
+take its refresh lock (an atomic cache.add) recomputes it, while every
+other caller keeps serving the stale value. An expiry therefore costs one
+recomputation however many requests arrive at the same time. Stale values
+are kept for SHARED_CACHE_STALE_TTL more seconds before the backend evicts
+them.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+KEY_PREFIX = 'shared:'
+
+# Upper bound on one recomputation; a crashed refresher's lock expires after this
+REFRESH_LOCK_TIMEOUT = 30
+
+# On a cold cache, how long callers wait for another worker's refresh before computing themselves
+COLD_WAIT = 2.0
+COLD_POLL_INTERVAL = 0.05
+
+
+def _store(cache_key, value, fresh_until):
+    ttl = settings.SHARED_CACHE_TTL
+    cache.set(cache_key, (value, fresh_until), ttl + settings.SHARED_CACHE_STALE_TTL)
+
+
+def shared_cached(key, compute, ttl=None):
+    """
+    Return the cached value for `key`, calling `compute()` to refresh it.
+
+    At most one caller per cache backend runs `compute()` for a stale
+    entry; the rest get the previous value until it is replaced.
+    """
+    ttl = settings.SHARED_CACHE_TTL if ttl is None else ttl
+    cache_key = KEY_PREFIX + key
+
+    entry = cache.get(cache_key)
+    if entry is not None and entry[1] > time.time():
+        return entry[0]
+
+    lock_key = cache_key + ':refresh'
+    if cache.add(lock_key, 1, REFRESH_LOCK_TIMEOUT):
+        try:
+            value = compute()
+            _store(cache_key, value, time.time() + ttl)
+            return value
+        finally:
+            cache.delete(lock_key)
+
+    # Someone else is refreshing: serve the stale value meanwhile
+    if entry is not None:
+        return entry[0]
+
+    # Nothing cached yet: wait for the refresher rather than piling onto the database
+    deadline = time.time() + COLD_WAIT
+    while time.time() < deadline:
+        time.sleep(COLD_POLL_INTERVAL)
+        entry = cache.get(cache_key)
+        if entry is not None:
+            return entry[0]
+    return compute()
+
+
+def expire_shared(key):
+    """Mark `key` stale so the next caller refreshes it (others keep the old value meanwhile)"""
+    cache_key = KEY_PREFIX + key
+    entry = cache.get(cache_key)
+    if entry is not None:
+        _store(cache_key, entry[0], 0)
@@ -0,0 +1,66 @@
+"""
+Conditional GET (ETag / If-None-Match) for per-user read endpoints.
+
+Endpoints that build their payload straight from the user's rows take
+their validator from one small aggregate query over those rows, so an
+unchanged poll is answered with a 304 before any of the view logic runs.
+
+Endpoints served from caches (core.response_cache, core.cache) use a hash
+of the rendered body instead: the cached body can lag behind the
+database, and a validator read from the database would then pair a new
+ETag with an old body. Responses are marked private and no-cache, which
+makes browsers (and fetch()) revalidate with the stored ETag on every
+request instead of re-downloading the payload.
+"""
+import hashlib
+
+from django.contrib.auth.models import User
+from django.db.models import Count, F, Max
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition, conditional_page
+
+from activities.models import PERFORMANCE_SCORE_VERSION
+
+
+def _user_data_version(user_id):
+    """The user's activity count and latest activity/survey update"""
+    return User.objects.filter(pk=user_id).annotate(
+        activities=Count('activity_results'),
+        activities_updated=Max('activity_results__date_updated'),
+        survey_updated=F('survey_result__date_updated'),
+    ).values('activities', 'activities_updated', 'survey_updated').first()
+
+
+def _etag(request, version):
+    parts = [request.user.id, PERFORMANCE_SCORE_VERSION] + [version[key] for key in sorted(version)]
+    return hashlib.md5(":".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def user_data_etag(request, *args, **kwargs):
+    """Validator for payloads built only from the user's own survey and activities"""
+    return _etag(request, _user_data_version(request.user.id))
+
+
+def conditional_get(etag_func=None):
+    """
+    Method decorator for APIView.get: answer 304 when the client's ETag
+    matches `etag_func(request)`, otherwise run the view and attach the ETag.
+
+    Without `etag_func` the view always runs and the ETag is a hash of the
+    rendered body (Django's ConditionalGetMiddleware, for this view only).
+    """
+    def decorator(view_func):
+        if etag_func is None:
+            conditional_view = conditional_page(view_func)
+        else:
+            conditional_view = condition(etag_func=etag_func)(view_func)
+
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            # Per-user payloads: never shared, always revalidated
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ['Authorization'])
+            return response
+        return wrapper
+    return method_decorator(decorator)
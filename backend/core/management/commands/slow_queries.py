@@ -0,0 +1,86 @@
+import json
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand
+
+from core.slow_queries import read_slow_queries
+
+
+class Command(BaseCommand):
+    help = "List or summarize queries recorded in the slow-query log"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', help="Log file to read (default: SLOW_QUERY_LOG['PATH'])")
+        parser.add_argument('--view', help="Only queries whose view or endpoint contains this text")
+        parser.add_argument('--min-ms', type=float, default=0, help="Only queries at least this slow")
+        parser.add_argument('--since', type=float, help="Only queries from the last SINCE hours")
+        parser.add_argument('--limit', type=int, default=20, help="Entries or groups shown (default: 20)")
+        parser.add_argument(
+            '--summary', action='store_true',
+            help="Group identical SQL and rank by total time instead of listing the slowest queries"
+        )
+        parser.add_argument('--plans', action='store_true', help="Show the EXPLAIN output")
+        parser.add_argument('--json', action='store_true', help="Print the matching entries as JSON")
+
+    def handle(self, *args, **options):
+        entries = [entry for entry in read_slow_queries(options['path']) if self.matches(entry, options)]
+
+        if options['json']:
+            self.stdout.write(json.dumps(entries, indent=2))
+            return
+        if not entries:
+            self.stdout.write("No slow queries recorded.")
+            return
+
+        if options['summary']:
+            self.write_summary(entries, options)
+        else:
+            entries.sort(key=lambda entry: entry['duration_ms'], reverse=True)
+            for entry in entries[:options['limit']]:
+                self.write_entry(entry, options['plans'])
+
+        self.stdout.write(self.style.SUCCESS(f"{len(entries)} slow queries matched."))
+
+    def matches(self, entry, options):
+        if entry['duration_ms'] < options['min_ms']:
+            return False
+        if options['view']:
+            haystack = f"{entry.get('view') or ''} {entry.get('endpoint') or ''}"
+            if options['view'] not in haystack:
+                return False
+        if options['since'] is not None:
+            cutoff = datetime.now(timezone.utc) - timedelta(hours=options['since'])
+            if datetime.fromisoformat(entry['time']) < cutoff:
+                return False
+        return True
+
+    def write_entry(self, entry, plans):
+        self.stdout.write(
+            f"{entry['duration_ms']:.1f} ms  {entry['method']} {entry['endpoint']}  "
+            f"{entry['view'] or '-'}  ({entry['time']})"
+        )
+        self.stdout.write(f"  {entry['sql']}")
+        for frame in entry['frames']:
+            self.stdout.write(f"    at {frame}")
+        if plans and entry['plan']:
+            for line in entry['plan']:
+                self.stdout.write(f"    | {line}")
+
+    def write_summary(self, entries, options):
+        groups = defaultdict(list)
+        for entry in entries:
+            groups[entry['sql']].append(entry)
+
+        ranked = sorted(groups.values(), key=lambda group: sum(e['duration_ms'] for e in group), reverse=True)
+        for group in ranked[:options['limit']]:
+            durations = [entry['duration_ms'] for entry in group]
+            views = sorted({entry['view'] or '-' for entry in group})
+            self.stdout.write(
+                f"{len(group)}x  total {sum(durations):.1f} ms  max {max(durations):.1f} ms  "
+                f"avg {sum(durations) / len(durations):.1f} ms  {', '.join(views)}"
+            )
+            self.stdout.write(f"  {group[0]['sql']}")
+            if options['plans'] and group[-1]['plan']:
+                for line in group[-1]['plan']:
+                    self.stdout.write(f"    | {line}")
@@ -0,0 +1,207 @@
+"""
+Per-request performance metrics.
+
+MetricsMiddleware measures every request:
+
+- the number of database queries and the time spent in them;
+- view time (from the view being called until it returns its response);
+- serialization time (rendering a DRF Response);
+- total time.
+
+It reports them to the client in a Server-Timing header and adds them to
+in-process histograms per endpoint (URL route) and method. `/metrics`
+serves the histograms in the Prometheus text format. Each gunicorn worker
+keeps its own registry, so Prometheus should scrape every worker or
+aggregate with sum().
+
+Set METRICS_TOKEN to require `Authorization: Bearer <token>` on /metrics.
+Without a token, /metrics is only open to staff sessions, or to everyone
+when DEBUG is on.
+"""
+import hmac
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+# Histogram bucket upper bounds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class RequestMetrics:
+    """Timings of one request (attached to the request as `request.metrics`)"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.view_started = None
+        self.view_time = 0.0
+        self.render_started = None
+        self.render_time = 0.0
+        self.total_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper() hook: count and time every query
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    def server_timing(self):
+        return ", ".join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+            f"view;dur={self.view_time * 1000:.1f}",
+            f"render;dur={self.render_time * 1000:.1f}",
+            f"total;dur={self.total_time * 1000:.1f}",
+        ])
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+
+class MetricsRegistry:
+    """Per-endpoint histograms of request duration, DB time, render time and query count"""
+
+    METRICS = {
+        'http_request_duration_seconds': ('Total request time', DURATION_BUCKETS),
+        'http_request_db_seconds': ('Time spent in database queries per request', DURATION_BUCKETS),
+        'http_request_view_seconds': ('Time spent in the view per request', DURATION_BUCKETS),
+        'http_request_render_seconds': ('Time spent serializing the response per request', DURATION_BUCKETS),
+        'http_request_db_queries': ('Database queries per request', QUERY_COUNT_BUCKETS),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}  # (metric, endpoint, method) -> Histogram
+
+    def observe(self, endpoint, method, metrics):
+        values = {
+            'http_request_duration_seconds': metrics.total_time,
+            'http_request_db_seconds': metrics.db_time,
+            'http_request_view_seconds': metrics.view_time,
+            'http_request_render_seconds': metrics.render_time,
+            'http_request_db_queries': metrics.queries,
+        }
+        with self._lock:
+            for name, value in values.items():
+                key = (name, endpoint, method)
+                if key not in self._histograms:
+                    self._histograms[key] = Histogram(self.METRICS[name][1])
+                self._histograms[key].observe(value)
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        with self._lock:
+            for name, (help_text, _) in self.METRICS.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for (metric, endpoint, method), histogram in sorted(self._histograms.items()):
+                    if metric != name:
+                        continue
+                    labels = f'endpoint="{_escape(endpoint)}",method="{method}"'
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                    lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
+
+
+def endpoint_label(request):
+    """URL route of the request (bounded label values), not the raw path"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return '/' + match.route if match.route else match.view_name or 'unknown'
+
+
+class MetricsMiddleware:
+    """Collect RequestMetrics for every request (place near the top of MIDDLEWARE)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        request.metrics = metrics
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            response = self.get_response(request)
+
+        now = time.perf_counter()
+        if metrics.view_started is not None and not metrics.view_time:
+            # Not a rendered response: the view ran until now
+            metrics.view_time = now - metrics.view_started
+        metrics.total_time = now - metrics.started
+
+        response['Server-Timing'] = metrics.server_timing()
+        registry.observe(endpoint_label(request), request.method, metrics)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Runs right before a DRF Response is rendered
+        metrics = request.metrics
+        metrics.render_started = time.perf_counter()
+        metrics.view_time = metrics.render_started - metrics.view_started
+
+        def rendered(response):
+            metrics.render_time = time.perf_counter() - metrics.render_started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint"""
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token:
+        # Compared as bytes: compare_digest() rejects non-ASCII str with a TypeError
+        supplied = request.headers.get('Authorization', '').encode()
+        if not hmac.compare_digest(supplied, f"Bearer {token}".encode()):
+            return HttpResponseForbidden("Invalid metrics token")
+    elif not settings.DEBUG and not getattr(request.user, 'is_staff', False):
+        return HttpResponseForbidden("Set METRICS_TOKEN to scrape metrics")
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,184 @@
+"""
+On-demand CPU and memory profiling of single requests.
+
+Send `X-Profile: 1` (or add `?profile=1`) to run the whole request under
+cProfile and tracemalloc. The profile covers everything below this
+middleware: JWT authentication, the view and rendering. That includes
+ActivityAnalysisView, GenerateRecommendationView and the token endpoints.
+Each profile is written to PROFILING['DIR'] as two files:
+
+- `<name>.prof`: the raw cProfile stats, for `python -m pstats` or snakeviz;
+- `<name>.json`: the top functions by cumulative time and the top
+  allocation deltas by source line.
+
+Files are named `<UTC time>-<method>-<route>-u<user id>`, so profiles of
+the same endpoint sort together for comparison. The response carries the
+name in an `X-Profile` header.
+
+Only staff users (session or JWT) may profile, unless PROFILING['ENABLED']
+is set, which opens it to every request (local development). One request
+per process is profiled at a time. tracemalloc traces the whole process,
+so allocation deltas also include other threads that ran meanwhile.
+
+Settings (all optional):
+
+    PROFILING = {
+        'ENABLED': False,          # profile any request that asks, not only staff
+        'DIR': BASE_DIR / 'profiles',
+        'TOP': 40,                 # functions / allocation sites kept in the summary
+    }
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .metrics import endpoint_label
+
+DEFAULTS = {
+    'ENABLED': False,
+    'DIR': os.path.join(settings.BASE_DIR, 'profiles'),
+    'TOP': 40,
+}
+
+HEADER = 'X-Profile'
+QUERY_PARAM = 'profile'
+
+# cProfile and tracemalloc are process-wide: one profiled request at a time
+_profile_lock = threading.Lock()
+
+
+def profiling_options():
+    return {**DEFAULTS, **getattr(settings, 'PROFILING', {})}
+
+
+def profile_requested(request):
+    value = request.headers.get(HEADER) or request.GET.get(QUERY_PARAM)
+    return value not in (None, '', '0', 'false')
+
+
+def _request_user(request):
+    """Session user, else the JWT user; None when neither authenticates"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user
+    try:
+        authenticated = JWTAuthentication().authenticate(request)
+    except Exception:
+        return None
+    return authenticated[0] if authenticated else None
+
+
+def profile_allowed(user, options):
+    return options['ENABLED'] or (user is not None and user.is_staff)
+
+
+def profile_name(request, user):
+    route = re.sub(r'[^A-Za-z0-9]+', '-', endpoint_label(request)).strip('-') or 'root'
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+    return f"{stamp}-{request.method}-{route}-u{user.id if user else 'anon'}"
+
+
+def cpu_summary(profiler, top):
+    """Top functions by cumulative time"""
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, lineno, function), (calls, primitive_calls, total, cumulative, _) in stats.stats.items():
+        rows.append({
+            'function': f"{filename}:{lineno}({function})",
+            'calls': calls,
+            'primitive_calls': primitive_calls,
+            'total_time': round(total, 6),
+            'cumulative_time': round(cumulative, 6),
+        })
+    rows.sort(key=lambda row: row['cumulative_time'], reverse=True)
+    return rows[:top]
+
+
+def memory_summary(before, after, top):
+    """Top allocation deltas by source line"""
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), 'lineno')
+    return [
+        {
+            'line': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            'size_diff': stat.size_diff,
+            'count_diff': stat.count_diff,
+            'size': stat.size,
+        }
+        for stat in diff[:top]
+    ]
+
+
+class ProfilingMiddleware:
+    """Profile requests that ask for it (place right below AuthenticationMiddleware)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profile_requested(request):
+            return self.get_response(request)
+
+        options = profiling_options()
+        # Resolved once: the JWT fallback costs a user lookup
+        user = _request_user(request)
+        if not profile_allowed(user, options):
+            return self.get_response(request)
+
+        if not _profile_lock.acquire(blocking=False):
+            response = self.get_response(request)
+            response[HEADER] = 'busy'
+            return response
+        try:
+            return self.profile(request, user, options)
+        finally:
+            _profile_lock.release()
+
+    def profile(self, request, user, options):
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        memory_before = tracemalloc.take_snapshot()
+        profiler = cProfile.Profile()
+
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+            elapsed = time.perf_counter() - started
+            memory_after = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            if started_tracing:
+                tracemalloc.stop()
+
+        name = profile_name(request, user)
+        os.makedirs(options['DIR'], exist_ok=True)
+        profiler.dump_stats(os.path.join(options['DIR'], name + '.prof'))
+        summary = {
+            'method': request.method,
+            'path': request.get_full_path(),
+            'endpoint': endpoint_label(request),
+            'status': response.status_code,
+            'wall_time': round(elapsed, 6),
+            'peak_traced_memory': peak,
+            'cpu': cpu_summary(profiler, options['TOP']),
+            'memory': memory_summary(memory_before, memory_after, options['TOP']),
+        }
+        with open(os.path.join(options['DIR'], name + '.json'), 'w') as summary_file:
+            json.dump(summary, summary_file, indent=2)
+
+        response[HEADER] = name
+        return response
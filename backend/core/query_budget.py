@@ -0,0 +1,170 @@
+"""
+Per-view database query budgets.
+
+A view declares how many queries one request may run, either on the class
+
+    class LeaderboardView(APIView):
+        query_budget = 1                        # every method
+        query_budget = {'GET': 2, 'POST': 12}   # per method
+
+or in settings, keyed by URL name (this wins over the class attribute):
+
+    QUERY_BUDGETS = {'leaderboard': 1, 'activity-result': {'GET': 2}}
+
+QueryBudgetMiddleware counts the queries run while the view executes,
+including DRF authentication (the JWT user lookup). Transaction control
+(BEGIN, SAVEPOINT, RELEASE, COMMIT, ROLLBACK) is not counted: whether it
+reaches the database differs between backends and nesting levels.
+
+When a request goes over budget it logs a warning listing each query and
+the project code that issued it, and sets an X-Query-Budget header
+("<queries>/<budget>") on the response. If settings.QUERY_BUDGET_RAISE
+is set (the default under DEBUG and `manage.py test`) it raises
+QueryBudgetExceeded instead, unless the view wrote to the database: by
+then the write is committed, and a 500 would tell the client it failed.
+Views without a budget are not tracked.
+"""
+import logging
+import os
+import sys
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Project frames shown per query
+STACK_DEPTH = 3
+
+# Execute-wrapper and middleware modules skipped when locating where a query came from
+INSTRUMENTATION_FILES = (
+    os.path.join('core', 'query_budget.py'),
+    os.path.join('core', 'metrics.py'),
+    os.path.join('core', 'slow_queries.py'),
+    os.path.join('core', 'profiling.py'),
+    os.path.join('core', 'traffic_capture.py'),
+    'middleware.py',
+)
+
+
+# Statements that are not counted against a budget / that make a request a write
+TRANSACTION_CONTROL = ('BEGIN', 'SAVEPOINT', 'RELEASE', 'COMMIT', 'ROLLBACK')
+WRITES = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def _statement(sql):
+    return sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ''
+
+
+def _frame_locations(depth):
+    """(filename, line, function) of the innermost project frames, innermost last"""
+    base_dir = str(settings.BASE_DIR)
+    locations = []
+    # Walk the frame objects directly: no FrameSummary objects, no source line lookups
+    frame = sys._getframe(1)
+    while frame is not None and len(locations) < depth:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(base_dir)
+            and 'site-packages' not in filename
+            and not filename.endswith(INSTRUMENTATION_FILES)
+        ):
+            locations.append((filename, frame.f_lineno, frame.f_code.co_name))
+        frame = frame.f_back
+    locations.reverse()
+    return locations
+
+
+def format_frames(locations):
+    base_dir = str(settings.BASE_DIR)
+    return [f"{os.path.relpath(filename, base_dir)}:{line} in {name}" for filename, line, name in locations]
+
+
+def project_frames(depth=STACK_DEPTH):
+    """The innermost project frames of the current stack, skipping libraries and middleware"""
+    return format_frames(_frame_locations(depth))
+
+
+class QueryRecorder:
+    """execute_wrapper hook recording each query's SQL and where it came from"""
+
+    def __init__(self):
+        self.active = False
+        self.queries = []
+        self.wrote = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.active:
+            statement = _statement(sql)
+            if statement in WRITES:
+                self.wrote = True
+            if statement not in TRANSACTION_CONTROL:
+                # Formatted only if the request goes over budget
+                self.queries.append((sql, _frame_locations(STACK_DEPTH)))
+        return execute(sql, params, many, context)
+
+
+def view_query_budget(request, view_func):
+    """Budget for this request's method, or None when the view has none"""
+    budget = None
+    url_name = getattr(request.resolver_match, 'url_name', None)
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    if url_name in budgets:
+        budget = budgets[url_name]
+    else:
+        view_class = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None)
+        budget = getattr(view_class, 'query_budget', None)
+
+    if isinstance(budget, dict):
+        budget = budget.get(request.method)
+    return budget
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        request._query_budget = (None, recorder)
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        recorder.active = False
+
+        budget, _ = request._query_budget
+        if budget is not None and len(recorder.queries) > budget:
+            self.report(request, budget, recorder)
+            response['X-Query-Budget'] = f"{len(recorder.queries)}/{budget}"
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        budget = view_query_budget(request, view_func)
+        _, recorder = request._query_budget
+        request._query_budget = (budget, recorder)
+        recorder.active = budget is not None
+
+    def process_template_response(self, request, response):
+        # Stop counting before rendering; the budget covers the view only
+        request._query_budget[1].active = False
+        return response
+
+    def report(self, request, budget, recorder):
+        lines = [
+            f"{request.method} {request.path} ran {len(recorder.queries)} queries (budget {budget}):"
+        ]
+        for number, (sql, frames) in enumerate(recorder.queries, 1):
+            lines.append(f"  {number}. {sql}")
+            lines.extend(f"       at {frame}" for frame in format_frames(frames))
+        message = "\n".join(lines)
+
+        if getattr(settings, 'QUERY_BUDGET_RAISE', settings.DEBUG) and not recorder.wrote:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
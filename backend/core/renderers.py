@@ -0,0 +1,41 @@
+"""
+JSON renderer backed by orjson.
+
+orjson encodes dicts, lists, datetimes and numpy arrays natively and is
+several times faster than json.dumps() with DRF's encoder. Anything it does
+not know (timedelta, Decimal, lazy strings, ...) is handed to DRF's
+JSONEncoder, so the output matches JSONRenderer. Falls back to JSONRenderer
+when orjson is not installed or an indented response is requested.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+if orjson is not None:
+    # UTC datetimes as "...Z", like DRF's encoder; int keys as strings, like json.dumps()
+    ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+_fallback_encoder = JSONEncoder()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Drop-in replacement for JSONRenderer (see REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'])"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # The browsable API and `Accept: application/json; indent=4` still pretty-print
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=_fallback_encoder.default, option=ORJSON_OPTIONS)
+
+        # Escape U+2028/U+2029 like JSONRenderer, keeping the output a strict JavaScript subset
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
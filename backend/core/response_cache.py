@@ -0,0 +1,138 @@
+"""
+Per-user versioned cache for view payloads.
+
+Each user has a version number in Django's cache. Payloads are stored
+under (view name, user id, version), so bumping the version on every write
+to the user's SurveyResult or ActivityResult rows makes all of their
+cached payloads unreachable at once. Nothing has to be deleted; old
+entries age out.
+
+Lookups go through a small in-process LRU first (bounded by MAX_ENTRIES,
+each entry expiring after TTL seconds), then the configured cache alias,
+which may be a local-memory or file-based backend. Hit/miss counters are
+kept per process and reported by stats().
+
+Settings (all optional):
+
+    RESPONSE_CACHE = {
+        'ALIAS': 'default',    # Django cache alias for versions and payloads
+        'TTL': 60,             # seconds a payload is served (bounds peer-stat staleness)
+        'MAX_ENTRIES': 1000,   # in-process LRU size
+    }
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+DEFAULTS = {
+    'ALIAS': 'default',
+    'TTL': 60,
+    'MAX_ENTRIES': 1000,
+}
+
+
+class VersionedResponseCache:
+    def __init__(self, alias=None, ttl=None, max_entries=None):
+        options = {**DEFAULTS, **getattr(settings, 'RESPONSE_CACHE', {})}
+        self.alias = alias or options['ALIAS']
+        self.ttl = options['TTL'] if ttl is None else ttl
+        self.max_entries = options['MAX_ENTRIES'] if max_entries is None else max_entries
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _version_key(self, user_id):
+        return f"response_version:{user_id}"
+
+    def user_version(self, user_id):
+        key = self._version_key(user_id)
+        version = self.cache.get(key)
+        if version is None:
+            # Start from the clock, so a version key that was evicted can
+            # never come back with a number an old payload was stored under
+            self.cache.add(key, time.time_ns(), None)
+            version = self.cache.get(key)
+        return version
+
+    def bump(self, user_ids):
+        """Invalidate every cached payload of these users"""
+        for user_id in set(user_ids):
+            key = self._version_key(user_id)
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                # Not cached yet (or evicted): any fresh clock value is newer
+                self.cache.set(key, time.time_ns(), None)
+            self._count('invalidations')
+
+    def get_or_compute(self, name, user_id, compute):
+        """
+        Cached payload of view `name` for the user, or `compute()` stored.
+
+        A `compute()` result of None is returned but not cached.
+        """
+        key = f"response:{name}:{user_id}:{self.user_version(user_id)}"
+
+        data = self._local_get(key)
+        if data is not None:
+            self._count('local_hits')
+            return data
+
+        data = self.cache.get(key)
+        if data is not None:
+            self._count('shared_hits')
+            self._local_set(key, data)
+            return data
+
+        self._count('misses')
+        data = compute()
+        if data is not None:
+            self.cache.set(key, data, self.ttl)
+            self._local_set(key, data)
+        return data
+
+    def _local_get(self, key):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            expires_at, data = entry
+            if expires_at <= time.monotonic():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return data
+
+    def _local_set(self, key, data):
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.ttl, data)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    def _count(self, counter):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def stats(self):
+        """Counters for this process, with the overall hit ratio"""
+        with self._lock:
+            stats = dict(self._counters, local_entries=len(self._local), max_entries=self.max_entries)
+        lookups = stats['local_hits'] + stats['shared_hits'] + stats['misses']
+        stats['hit_ratio'] = round((stats['local_hits'] + stats['shared_hits']) / lookups, 4) if lookups else None
+        return stats
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+
+response_cache = VersionedResponseCache()
@@ -4,6 +4,7 @@ Django settings for core project.
 
 from pathlib import Path
 import os
+import sys
 import dj_database_url
 
 # --------------------------------------------------
@@ -44,6 +45,9 @@ INSTALLED_APPS = [
     "survey",
     "activities",
     "recommendations",  # ✅ NEW APP FOR COMBINED RECOMMENDATIONS
+    "dashboard",
+    "invalidation",
+    "core",  # Management commands (slow_queries)
     'django_extensions',
 ]
 
@@ -53,6 +57,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",  # ✅ MUST BE FIRST
+    "core.metrics.MetricsMiddleware",  # Query count/timings → Server-Timing and /metrics
+    "core.traffic_capture.TrafficCaptureMiddleware",  # Sampled, anonymized /api/ traffic → logs/traffic.jsonl
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
 
@@ -60,6 +66,10 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.profiling.ProfilingMiddleware",  # X-Profile: 1 → cProfile/tracemalloc dump (staff only; needs request.user)
+    "invalidation.middleware.InvalidationMiddleware",
+    "core.query_budget.QueryBudgetMiddleware",
+    "core.slow_queries.SlowQueryMiddleware",  # Queries over SLOW_QUERY_LOG threshold → logs/, with EXPLAIN
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -101,6 +111,110 @@ DATABASES = {
     )
 }
 
+# The migration history cannot be replayed on an empty database (survey and
+# activities both create survey_activityresult), so test databases are built
+# straight from the models
+DATABASES["default"]["TEST"] = {"MIGRATE": False}
+
+# --------------------------------------------------
+# CACHE (Redis when REDIS_URL is set, so all workers share it)
+# --------------------------------------------------
+
+REDIS_URL = os.environ.get("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    # Per-process memory: each worker refreshes shared entries on its own
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Leaderboard and peer statistics (core.cache): seconds an entry is fresh,
+# then how much longer a stale entry may be served while one worker refreshes it
+SHARED_CACHE_TTL = int(os.environ.get("SHARED_CACHE_TTL", 30))
+SHARED_CACHE_STALE_TTL = int(os.environ.get("SHARED_CACHE_STALE_TTL", 300))
+
+# Per-user analysis/recommendation payloads (core.response_cache), invalidated
+# on every survey or activity write; TTL bounds how stale peer statistics get
+RESPONSE_CACHE = {
+    "ALIAS": "default",
+    "TTL": int(os.environ.get("RESPONSE_CACHE_TTL", 60)),
+    "MAX_ENTRIES": int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", 1000)),
+}
+
+# Cross-worker invalidation (invalidation.bus): only needed while each worker
+# has its own cache; a worker serves invalidated data for at most POLL_INTERVAL seconds
+INVALIDATION_BUS = {
+    "ENABLED": not REDIS_URL,
+    "POLL_INTERVAL": int(os.environ.get("INVALIDATION_POLL_INTERVAL", 2)),
+    "OVERLAP": 10,
+    "RETENTION": 3600,
+}
+
+# --------------------------------------------------
+# METRICS (core.metrics)
+# --------------------------------------------------
+
+# When set, /metrics requires "Authorization: Bearer <METRICS_TOKEN>";
+# when unset, only staff sessions (or anyone with DEBUG on) may read it
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+# --------------------------------------------------
+# PROFILING (core.profiling)
+# --------------------------------------------------
+
+# Requests sent with "X-Profile: 1" or "?profile=1" are profiled for staff users,
+# or for everyone when PROFILING_ENABLED is set; results go to DIR
+PROFILING = {
+    "ENABLED": os.environ.get("PROFILING_ENABLED", "False") == "True",
+    "DIR": os.environ.get("PROFILING_DIR", BASE_DIR / "profiles"),
+    "TOP": 40,
+}
+
+# --------------------------------------------------
+# QUERY BUDGETS (core.query_budget)
+# --------------------------------------------------
+
+# Per-view overrides keyed by URL name, e.g. {"leaderboard": 1, "activity-result": {"GET": 2}};
+# views otherwise declare `query_budget` on the class
+QUERY_BUDGETS = {}
+
+# Raise instead of logging when a view goes over budget (only if the view wrote nothing)
+QUERY_BUDGET_RAISE = DEBUG or sys.argv[1:2] == ["test"]
+
+# --------------------------------------------------
+# SLOW QUERY LOG (core.slow_queries; read with `manage.py slow_queries`)
+# --------------------------------------------------
+
+SLOW_QUERY_LOG = {
+    "ENABLED": os.environ.get("SLOW_QUERY_LOG", "True") == "True",
+    "THRESHOLD_MS": int(os.environ.get("SLOW_QUERY_MS", 100)),
+    "PATH": os.environ.get("SLOW_QUERY_LOG_PATH", BASE_DIR / "logs" / "slow_queries.log"),
+    "MAX_BYTES": 5 * 1024 * 1024,
+    "BACKUP_COUNT": 5,
+    "EXPLAIN": True,
+}
+
+# --------------------------------------------------
+# TRAFFIC CAPTURE (core.traffic_capture; replay with benchmarks/replay.py)
+# --------------------------------------------------
+
+TRAFFIC_CAPTURE = {
+    "ENABLED": os.environ.get("TRAFFIC_CAPTURE", "False") == "True",
+    "SAMPLE_RATE": float(os.environ.get("TRAFFIC_CAPTURE_SAMPLE_RATE", 0.05)),
+    "PATH": os.environ.get("TRAFFIC_CAPTURE_PATH", BASE_DIR / "logs" / "traffic.jsonl"),
+    "MAX_BYTES": 20 * 1024 * 1024,
+    "BACKUP_COUNT": 5,
+}
+
 # --------------------------------------------------
 # PASSWORD VALIDATION
 # --------------------------------------------------
@@ -121,6 +235,17 @@ REST_FRAMEWORK = {
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
     "EXCEPTION_HANDLER": "core.exceptions.custom_exception_handler",
+    # orjson-backed JSON (falls back to DRF's JSONRenderer/JSONParser without orjson);
+    # swap back to rest_framework.renderers.JSONRenderer / parsers.JSONParser to disable
+    "DEFAULT_RENDERER_CLASSES": (
+        "core.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "core.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
 # --------------------------------------------------
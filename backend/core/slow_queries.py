@@ -0,0 +1,189 @@
+"""
+Slow-query log with EXPLAIN plans.
+
+SlowQueryMiddleware times every query a request runs. Each query slower
+than SLOW_QUERY_LOG['THRESHOLD_MS'] is written as one JSON line to a
+rotating log file, with:
+
+- the view and route that issued it, and the project frames it came from;
+- its duration and SQL (parameters are left out: they may hold personal data);
+- its query plan: EXPLAIN on PostgreSQL, EXPLAIN QUERY PLAN on SQLite.
+
+The plan is fetched right after the query, on a raw cursor, so it is not
+counted by the metrics or query-budget wrappers. Only SELECT, UPDATE and
+DELETE statements are explained; neither form of EXPLAIN runs them.
+
+Read the log with `manage.py slow_queries`.
+
+Settings (all optional):
+
+    SLOW_QUERY_LOG = {
+        'ENABLED': True,
+        'THRESHOLD_MS': 100,
+        'PATH': BASE_DIR / 'logs' / 'slow_queries.log',
+        'MAX_BYTES': 5 * 1024 * 1024,   # rotate after this size
+        'BACKUP_COUNT': 5,              # rotated files kept (slow_queries.log.1 ...)
+        'EXPLAIN': True,
+    }
+"""
+import json
+import logging
+import os
+import time
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+
+from .metrics import endpoint_label
+from .query_budget import project_frames
+
+DEFAULTS = {
+    'ENABLED': True,
+    'THRESHOLD_MS': 100,
+    'PATH': os.path.join(settings.BASE_DIR, 'logs', 'slow_queries.log'),
+    'MAX_BYTES': 5 * 1024 * 1024,
+    'BACKUP_COUNT': 5,
+    'EXPLAIN': True,
+}
+
+EXPLAINABLE = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+
+logger = logging.getLogger(__name__)
+
+
+def slow_query_options():
+    return {**DEFAULTS, **getattr(settings, 'SLOW_QUERY_LOG', {})}
+
+
+def _log_file(options):
+    """Logger writing to the rotating log file (set up on first use)"""
+    file_logger = logging.getLogger(f"{__name__}.file")
+    if not file_logger.handlers:
+        os.makedirs(os.path.dirname(os.path.abspath(options['PATH'])), exist_ok=True)
+        handler = RotatingFileHandler(
+            options['PATH'], maxBytes=options['MAX_BYTES'],
+            backupCount=options['BACKUP_COUNT'], encoding='utf-8'
+        )
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        file_logger.addHandler(handler)
+        file_logger.setLevel(logging.INFO)
+        file_logger.propagate = False
+    return file_logger
+
+
+def _plan(connection, sql, params):
+    # A raw backend cursor: no execute wrappers, so EXPLAIN is not itself counted or logged
+    cursor = connection.create_cursor()
+    try:
+        with connection.wrap_database_errors:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+            # PostgreSQL returns one text column; SQLite's plan detail is the last column
+            return [str(row[-1]) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def explain(connection, sql, params):
+    """Query plan lines for `sql`, or None when it cannot be explained"""
+    if not sql.lstrip().upper().startswith(EXPLAINABLE):
+        return None
+    try:
+        if connection.in_atomic_block:
+            # On PostgreSQL a failed statement aborts the whole transaction, and
+            # with it the request's writes: give EXPLAIN a savepoint of its own
+            with transaction.atomic(using=connection.alias):
+                return _plan(connection, sql, params)
+        return _plan(connection, sql, params)
+    except DatabaseError as exc:
+        return [f"EXPLAIN failed: {exc}"]
+
+
+class SlowQueryRecorder:
+    """execute_wrapper hook logging queries of one request that exceed the threshold"""
+
+    def __init__(self, request, options):
+        self.request = request
+        self.options = options
+        self.threshold = options['THRESHOLD_MS'] / 1000
+        self.view = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = time.perf_counter() - started
+        if duration >= self.threshold:
+            try:
+                self.record(sql, params, many, context['connection'], duration)
+            except Exception:
+                # Never fail a request because of the log
+                logger.exception("Could not record slow query")
+        return result
+
+    def record(self, sql, params, many, connection, duration):
+        plan = None
+        if self.options['EXPLAIN'] and not many:
+            plan = explain(connection, sql, params)
+        entry = {
+            'time': datetime.now(timezone.utc).isoformat(),
+            'duration_ms': round(duration * 1000, 2),
+            'database': connection.alias,
+            'vendor': connection.vendor,
+            'method': self.request.method,
+            'path': self.request.path,
+            'endpoint': endpoint_label(self.request),
+            'view': self.view,
+            'frames': project_frames(),
+            'sql': sql,
+            'many': many,
+            'plan': plan,
+        }
+        _log_file(self.options).info(json.dumps(entry))
+
+
+def view_name(view_func):
+    view_class = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None)
+    target = view_class or view_func
+    return f"{target.__module__}.{target.__qualname__}"
+
+
+class SlowQueryMiddleware:
+    """Log slow queries of every request (place below the other query instrumentation)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        options = slow_query_options()
+        if not options['ENABLED']:
+            return self.get_response(request)
+
+        recorder = SlowQueryRecorder(request, options)
+        request._slow_query_recorder = recorder
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        recorder = getattr(request, '_slow_query_recorder', None)
+        if recorder is not None:
+            recorder.view = view_name(view_func)
+
+
+def read_slow_queries(path=None):
+    """Logged entries, oldest first, across the current file and its rotated backups"""
+    options = slow_query_options()
+    path = path or options['PATH']
+    files = [f"{path}.{number}" for number in range(options['BACKUP_COUNT'], 0, -1)] + [str(path)]
+    for filename in files:
+        if not os.path.exists(filename):
+            continue
+        with open(filename, encoding='utf-8') as log_file:
+            for line in log_file:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
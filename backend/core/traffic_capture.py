@@ -0,0 +1,171 @@
+"""
+Sampled capture of real API traffic, for local replay.
+
+TrafficCaptureMiddleware writes a sample of /api/ requests as JSON lines
+to a rotating file. Each line records the arrival time, method, route,
+path, the query and body *shape*, an anonymous user key, the response
+status, the duration and the query count.
+`benchmarks/replay.py` re-issues a capture against a local instance.
+
+Anonymization:
+
+- Strings become "<str:LENGTH>" placeholders. Fields in KEEP_FIELDS
+  (elective and activity names, durations, query options) keep their
+  value, so replayed requests stay valid.
+- Credentials and tokens (SECRET_FIELDS) become "<secret>".
+- Numbers and booleans are kept. Lists longer than LIST_SAMPLE keep their
+  length and the shape of their first item.
+- Users become an HMAC of their id keyed with SECRET_KEY. The key is
+  stable across workers and cannot be reversed without the secret.
+
+Settings (all optional):
+
+    TRAFFIC_CAPTURE = {
+        'ENABLED': False,
+        'SAMPLE_RATE': 0.05,              # share of /api/ requests captured
+        'PATH': BASE_DIR / 'logs' / 'traffic.jsonl',
+        'MAX_BYTES': 20 * 1024 * 1024,    # rotate after this size
+        'BACKUP_COUNT': 5,
+        'MAX_BODY_BYTES': 256 * 1024,     # larger bodies are recorded without their shape
+    }
+"""
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import time
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+
+from .metrics import endpoint_label
+
+DEFAULTS = {
+    'ENABLED': False,
+    'SAMPLE_RATE': 0.05,
+    'PATH': os.path.join(settings.BASE_DIR, 'logs', 'traffic.jsonl'),
+    'MAX_BYTES': 20 * 1024 * 1024,
+    'BACKUP_COUNT': 5,
+    'MAX_BODY_BYTES': 256 * 1024,
+}
+
+PATH_PREFIX = '/api/'
+
+# Values replayed as-is: row selectors, durations and query options, none of them personal
+KEEP_FIELDS = {
+    'elective', 'activity_name', 'selected_elective', 'completion_time',
+    'fields', 'completed', 'limit', 'leaderboard_limit', 'neighbors',
+}
+SECRET_FIELDS = {'password', 'username', 'refresh', 'access', 'token', 'email', 'full_name', 'cursor'}
+
+# Lists up to this long are kept item by item; longer ones as length + first item shape
+LIST_SAMPLE = 3
+
+logger = logging.getLogger(__name__)
+
+
+def capture_options():
+    return {**DEFAULTS, **getattr(settings, 'TRAFFIC_CAPTURE', {})}
+
+
+def _log_file(options):
+    """Logger writing to the rotating capture file (set up on first use)"""
+    file_logger = logging.getLogger(f"{__name__}.file")
+    if not file_logger.handlers:
+        os.makedirs(os.path.dirname(os.path.abspath(options['PATH'])), exist_ok=True)
+        handler = RotatingFileHandler(
+            options['PATH'], maxBytes=options['MAX_BYTES'],
+            backupCount=options['BACKUP_COUNT'], encoding='utf-8'
+        )
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        file_logger.addHandler(handler)
+        file_logger.setLevel(logging.INFO)
+        file_logger.propagate = False
+    return file_logger
+
+
+def shape(value, key=None):
+    """`value` with personal data replaced by placeholders (see module docstring)"""
+    if key in SECRET_FIELDS:
+        return '<secret>'
+    if isinstance(value, dict):
+        return {name: shape(item, name) for name, item in value.items()}
+    if isinstance(value, list):
+        if len(value) <= LIST_SAMPLE:
+            return [shape(item) for item in value]
+        return {'<list>': len(value), 'item': shape(value[0])}
+    if isinstance(value, str):
+        return value if key in KEEP_FIELDS else f'<str:{len(value)}>'
+    return value
+
+
+def anonymous_user_key(user):
+    if user is None or not user.is_authenticated:
+        return None
+    digest = hmac.new(settings.SECRET_KEY.encode(), f'traffic:{user.pk}'.encode(), hashlib.sha256)
+    return digest.hexdigest()[:16]
+
+
+def _query_shape(request):
+    return {key: shape(value, key) for key, value in request.GET.items()}
+
+
+def _body_shape(request, options):
+    if request.method not in ('POST', 'PUT', 'PATCH') or 'json' not in request.content_type:
+        return None
+    try:
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        return None
+    if length > options['MAX_BODY_BYTES']:
+        return '<too large>'
+    try:
+        # Read before the view: DRF consumes the stream, and request.body caches it for both
+        return shape(json.loads(request.body or b'null'))
+    except ValueError:
+        return '<invalid json>'
+
+
+class TrafficCaptureMiddleware:
+    """Sample /api/ requests to TRAFFIC_CAPTURE['PATH'] (place right below MetricsMiddleware)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        options = capture_options()
+        if (
+            not options['ENABLED']
+            or not request.path.startswith(PATH_PREFIX)
+            or random.random() >= options['SAMPLE_RATE']
+        ):
+            return self.get_response(request)
+
+        arrived = time.time()
+        started = time.perf_counter()
+        body = _body_shape(request, options)
+        response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        try:
+            metrics = getattr(request, 'metrics', None)
+            entry = {
+                'time': round(arrived, 4),
+                'method': request.method,
+                'endpoint': endpoint_label(request),
+                'path': request.path,
+                'query': _query_shape(request),
+                # DRF copies the JWT-authenticated user back onto the Django request
+                'user': anonymous_user_key(getattr(request, 'user', None)),
+                'body': body,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 2),
+                'queries': metrics.queries if metrics else None,
+            }
+            _log_file(options).info(json.dumps(entry, separators=(',', ':')))
+        except Exception:
+            # Never fail a request because of the capture
+            logger.exception("Could not capture request")
+        return response
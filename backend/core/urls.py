@@ -2,8 +2,12 @@ from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from .metrics import metrics_view
+from .views import ResponseCacheStatsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
 
     # 🔥 USER ROUTES
     path('api/users/', include('users.urls')),
@@ -17,4 +21,6 @@ urlpatterns = [
     path("api/", include("survey.urls")),
     path("api/", include("activities.urls")),
     path("api/", include("recommendations.urls")),  # ✅ NEW: Combined recommendations
+    path("api/", include("dashboard.urls")),
+    path("api/cache-stats/", ResponseCacheStatsView.as_view(), name="cache-stats"),
 ]
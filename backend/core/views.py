@@ -0,0 +1,14 @@
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework import status
+
+from .response_cache import response_cache
+
+
+class ResponseCacheStatsView(APIView):
+    """Hit ratio and LRU counters of this worker's per-user response cache"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(response_cache.stats(), status=status.HTTP_200_OK)
@@ -0,0 +1,60 @@
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+
+from activities.models import ActivityResult
+from core.conditional import conditional_get
+from activities.views import activity_result_rows
+from recommendations.services import get_recommendation
+from recommendations.views import recommendation_payload
+from survey.models import SurveyResult
+from survey.serializers import SurveyResultSerializer
+from survey.views import LEADERBOARD_SIZE, leaderboard_rows
+
+# Same cap as LeaderboardView
+MAX_LEADERBOARD_LIMIT = LEADERBOARD_SIZE
+
+
+class DashboardView(APIView):
+    """
+    Everything Dashboard.jsx shows, in one request.
+    
+    Returns the payloads of survey-result/me/, recommendation/,
+    activity-result/ and leaderboard/ (null when the user has no survey).
+    Query params: `completed=true` returns only completed activities,
+    `leaderboard_limit=N` trims the leaderboard to the top N.
+    """
+    permission_classes = [IsAuthenticated]
+    query_budget = 11  # Cold path: the user's first recommendation (see GenerateRecommendationView)
+    
+    @conditional_get()  # The leaderboard comes from the shared cache
+    def get(self, request):
+        user = request.user
+        
+        completed_only = request.query_params.get('completed', '').lower() in ('1', 'true', 'yes')
+        try:
+            leaderboard_limit = int(request.query_params.get('leaderboard_limit', MAX_LEADERBOARD_LIMIT))
+        except ValueError:
+            return Response(
+                {"detail": "leaderboard_limit must be an integer"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        leaderboard_limit = max(0, min(leaderboard_limit, MAX_LEADERBOARD_LIMIT))
+        
+        survey = SurveyResult.objects.filter(user=user).first()
+        
+        recommendation = None
+        if survey is not None:
+            recommendation = get_recommendation(user.id)
+        
+        activities = ActivityResult.objects.filter(user=user).order_by('-date_completed', '-id')
+        if completed_only:
+            activities = activities.filter(completed=True)
+        
+        return Response({
+            'survey': SurveyResultSerializer(survey).data if survey else None,
+            'recommendation': recommendation_payload(recommendation) if recommendation else None,
+            'activities': activity_result_rows(activities),
+            'leaderboard': leaderboard_rows(user, leaderboard_limit) if leaderboard_limit else [],
+        }, status=status.HTTP_200_OK)
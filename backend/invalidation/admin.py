@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import InvalidationEvent
+
+
+@admin.register(InvalidationEvent)
+class InvalidationEventAdmin(admin.ModelAdmin):
+    list_display = ['topic', 'key', 'origin', 'created_at']
+    list_filter = ['topic', 'created_at']
+    search_fields = ['key', 'origin']
@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+class InvalidationConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'invalidation'
+    
+    def ready(self):
+        from core.cache import expire_shared
+        from core.response_cache import response_cache
+        from . import bus
+        
+        # Replay other workers' invalidations against this process's caches
+        bus.subscribe(bus.RESPONSE_CACHE, lambda keys: response_cache.bump(int(key) for key in keys))
+        bus.subscribe(bus.SHARED_CACHE, lambda keys: [expire_shared(key) for key in keys])
@@ -0,0 +1,148 @@
+"""
+Cross-worker cache invalidation over the database.
+
+With a per-process cache backend every gunicorn worker holds its own copy
+of cached data. When one worker invalidates something it also publishes an
+InvalidationEvent row; every worker polls the table (at most once per
+POLL_INTERVAL seconds, from InvalidationMiddleware before the view runs)
+and hands new events from other workers to the handlers subscribed to
+their topic. A worker therefore never serves data invalidated more than
+POLL_INTERVAL seconds ago, without a separate message broker.
+
+Event ids come from a sequence, and on PostgreSQL a transaction that
+took a lower id can commit after one with a higher id has been read.
+Each poll therefore re-reads the events created in the last OVERLAP
+seconds as well as those past the highest id seen, and skips ids it has
+already applied. OVERLAP must exceed the longest transaction that
+publishes an event (plus clock skew between hosts).
+
+Settings:
+
+    INVALIDATION_BUS = {
+        'ENABLED': True,       # off when all workers share one cache (e.g. Redis)
+        'POLL_INTERVAL': 2,    # seconds; the bound on cross-worker staleness
+        'OVERLAP': 10,         # seconds of events re-read for late commits
+        'RETENTION': 3600,     # seconds events are kept before pruning
+    }
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import InvalidationEvent
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE = 'response_cache'   # keys: user ids (core.response_cache)
+SHARED_CACHE = 'shared_cache'       # keys: shared_cached() keys (core.cache)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'POLL_INTERVAL': 2,
+    'OVERLAP': 10,
+    'RETENTION': 3600,
+}
+
+# Events read per poll query
+POLL_BATCH_SIZE = 1000
+
+# Prune old events roughly once per this many polls
+PRUNE_EVERY = 100
+
+_handlers = {}
+_lock = threading.Lock()
+# `seen`: ids of events inside the overlap window already handled -> created_at
+_state = {'last_id': None, 'last_poll': 0.0, 'polls': 0, 'seen': {}}
+
+
+def _options():
+    return {**DEFAULTS, **getattr(settings, 'INVALIDATION_BUS', {})}
+
+
+def _origin():
+    # Evaluated per call so forked workers get their own pid
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def subscribe(topic, handler):
+    """Call `handler(keys)` with the keys of every other worker's events on `topic`"""
+    _handlers.setdefault(topic, []).append(handler)
+
+
+def publish(topic, keys):
+    """Tell the other workers to invalidate `keys` of `topic`"""
+    if not _options()['ENABLED']:
+        return
+    origin = _origin()
+    InvalidationEvent.objects.bulk_create([
+        InvalidationEvent(topic=topic, key=str(key), origin=origin) for key in set(keys)
+    ])
+
+
+def poll(force=False):
+    """Apply events published by other workers since the last poll, if one is due"""
+    options = _options()
+    if not options['ENABLED']:
+        return 0
+
+    with _lock:
+        now = time.monotonic()
+        if not force and now - _state['last_poll'] < options['POLL_INTERVAL']:
+            return 0
+        _state['last_poll'] = now
+        _state['polls'] += 1
+
+        if _state['last_id'] is None:
+            # A new worker starts with empty caches: only later events matter
+            latest = InvalidationEvent.objects.order_by('-id').values_list('id', flat=True).first()
+            _state['last_id'] = latest or 0
+            return 0
+
+        origin = _origin()
+        seen = _state['seen']
+        window_start = timezone.now() - timedelta(seconds=options['OVERLAP'])
+        applied = 0
+        page_after = 0
+        while True:
+            events = list(
+                InvalidationEvent.objects.filter(Q(id__gt=_state['last_id']) | Q(created_at__gte=window_start))
+                .filter(id__gt=page_after)
+                .order_by('id')
+                .values_list('id', 'topic', 'key', 'origin', 'created_at')[:POLL_BATCH_SIZE]
+            )
+            if not events:
+                break
+
+            keys_by_topic = {}
+            for event_id, topic, key, event_origin, created_at in events:
+                if event_id in seen:
+                    continue
+                seen[event_id] = created_at
+                if event_origin != origin:
+                    keys_by_topic.setdefault(topic, []).append(key)
+            for topic, keys in keys_by_topic.items():
+                for handler in _handlers.get(topic, []):
+                    handler(keys)
+                applied += len(keys)
+
+            page_after = events[-1][0]
+            _state['last_id'] = max(_state['last_id'], page_after)
+            if len(events) < POLL_BATCH_SIZE:
+                break
+
+        # Events created before the window are never read again
+        for event_id in [event_id for event_id, created_at in seen.items() if created_at < window_start]:
+            del seen[event_id]
+
+        if _state['polls'] % PRUNE_EVERY == 0:
+            cutoff = timezone.now() - timedelta(seconds=options['RETENTION'])
+            InvalidationEvent.objects.filter(created_at__lt=cutoff).delete()
+
+    return applied
@@ -0,0 +1,12 @@
+from . import bus
+
+
+class InvalidationMiddleware:
+    """Apply other workers' cache invalidations before the view reads any cache"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        bus.poll()
+        return self.get_response(request)
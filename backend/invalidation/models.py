@@ -0,0 +1,12 @@
+from django.db import models
+
+
+class InvalidationEvent(models.Model):
+    """One cache invalidation published by a worker (see invalidation.bus)"""
+    topic = models.CharField(max_length=50)  # Which cache, e.g. "response_cache"
+    key = models.CharField(max_length=100)  # What to invalidate in it, e.g. a user id
+    origin = models.CharField(max_length=100)  # host:pid of the publishing worker
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    def __str__(self):
+        return f"{self.topic}:{self.key} from {self.origin}"
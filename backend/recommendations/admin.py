@@ -3,6 +3,6 @@ from .models import ElectiveRecommendation
 
 @admin.register(ElectiveRecommendation)
 class ElectiveRecommendationAdmin(admin.ModelAdmin):
-    list_display = ['user', 'recommended_elective', 'confidence_score', 'date_generated']
-    list_filter = ['recommended_elective', 'date_generated']
+    list_display = ['user', 'recommended_elective', 'confidence_score', 'activities_completed', 'is_stale', 'date_generated']
+    list_filter = ['recommended_elective', 'is_stale', 'date_generated']
     search_fields = ['user__username', 'recommended_elective']
@@ -0,0 +1,239 @@
+"""
+Cohort-wide recommendation engine.
+
+Loads survey elective scores and per-elective activity score averages for
+a chunk of users into NumPy matrices (one row per user, one column per
+elective in ELECTIVES order), applies the survey/activity weighting,
+argmax and confidence gap as array operations and bulk-writes the
+results into ElectiveRecommendation. Memory is bounded by the chunk size.
+
+Writes follow the same compare-and-set as services.refresh_recommendation:
+row versions are read before any scores, and a row whose version moved in
+the meantime keeps its stale flag instead of being overwritten.
+"""
+import numpy as np
+from django.db import transaction
+from django.db.models import Avg, Count
+from django.utils import timezone
+
+from activities.models import ActivityResult
+from core.response_cache import response_cache
+from invalidation import bus
+from survey.models import SurveyResult
+
+from .models import ElectiveRecommendation
+from .services import ELECTIVES, SURVEY_WEIGHT, ACTIVITY_WEIGHT
+
+ELECTIVE_INDEX = {elective: i for i, elective in enumerate(ELECTIVES)}
+
+UPDATE_FIELDS = [
+    'survey_scores', 'survey_weight', 'activity_scores', 'activity_weight', 'final_scores',
+    'recommended_elective', 'confidence_score', 'activities_completed', 'is_stale', 'date_generated',
+]
+
+
+def survey_value(scores, elective):
+    """Numeric survey score for an elective code (0 when missing or malformed)"""
+    try:
+        return float(scores.get(elective, 0) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def iter_score_matrices(chunk_size=5000):
+    """
+    Yield (user_ids, survey_matrix, activity_matrix, activity_counts) per chunk.
+
+    Each chunk costs two queries: a keyset page of survey results and one
+    grouped aggregate over the activity rows of that user-id range.
+    """
+    last_user_id = 0
+    while True:
+        surveys = list(
+            SurveyResult.objects.filter(user_id__gt=last_user_id)
+            .order_by('user_id')
+            .values_list('user_id', 'elective_scores')[:chunk_size]
+        )
+        if not surveys:
+            return
+
+        yield score_matrices(surveys)
+        last_user_id = surveys[-1][0]
+
+
+def score_matrices(surveys):
+    """
+    Score matrices for (user_id, elective_scores) pairs sorted by user id.
+
+    Returns (user_ids, survey_matrix, activity_matrix, activity_counts);
+    the activity averages come from one grouped aggregate over the id range.
+    """
+    user_ids = np.fromiter((user_id for user_id, _ in surveys), dtype=np.int64, count=len(surveys))
+    survey_matrix = np.array(
+        [[survey_value(scores or {}, e) for e in ELECTIVES] for _, scores in surveys],
+        dtype=np.float64
+    ).reshape(len(surveys), len(ELECTIVES))
+
+    activity_matrix = np.zeros((len(surveys), len(ELECTIVES)), dtype=np.float64)
+    activity_counts = np.zeros(len(surveys), dtype=np.int64)
+
+    totals = list(
+        ActivityResult.objects.filter(user_id__gte=user_ids[0], user_id__lte=user_ids[-1])
+        .values_list('user_id', 'elective')
+        .annotate(count=Count('id'), average_score=Avg('performance_score'))
+        .order_by()
+    )
+    if totals:
+        totals_user_ids = np.fromiter((row[0] for row in totals), dtype=np.int64, count=len(totals))
+        columns = np.fromiter((ELECTIVE_INDEX.get(row[1], -1) for row in totals), dtype=np.int64, count=len(totals))
+        counts = np.fromiter((row[2] for row in totals), dtype=np.int64, count=len(totals))
+        averages = np.fromiter((row[3] or 0 for row in totals), dtype=np.float64, count=len(totals))
+
+        # Map activity rows onto survey rows; users in the id range without a survey are dropped
+        rows = np.clip(np.searchsorted(user_ids, totals_user_ids), 0, len(user_ids) - 1)
+        matched = user_ids[rows] == totals_user_ids
+        np.add.at(activity_counts, rows[matched], counts[matched])
+
+        known = matched & (columns >= 0)
+        activity_matrix[rows[known], columns[known]] = averages[known]
+
+    return user_ids, survey_matrix, activity_matrix, activity_counts
+
+
+def combine_matrices(survey_matrix, activity_matrix, survey_weight=SURVEY_WEIGHT, activity_weight=ACTIVITY_WEIGHT):
+    """
+    Vectorized counterpart of services.combine_scores().
+
+    Weights may be scalars or arrays broadcastable against the score
+    matrices (e.g. shape (k, 1, 1) to evaluate k weight sets at once).
+    Returns (final_scores, recommended_index, confidence_score) arrays.
+    """
+    final_scores = np.round(survey_matrix * survey_weight + activity_matrix * activity_weight, 1)
+
+    # argmax returns the first maximum, matching max() over ELECTIVES order
+    recommended_index = np.argmax(final_scores, axis=-1)
+
+    ranked = np.sort(final_scores, axis=-1)
+    gap = ranked[..., -1] - ranked[..., -2]
+    confidence_score = np.minimum(100, np.round(50 + gap * 2))
+
+    return final_scores, recommended_index, confidence_score
+
+
+def _scores_dict(row):
+    return dict(zip(ELECTIVES, row))
+
+
+def read_versions(user_ids):
+    """
+    {user_id: (pk, version)} of the users' stored rows.
+
+    Users without one get a stale placeholder first, as in
+    services._stale_row: writers can only flag an existing row.
+    """
+    ElectiveRecommendation.objects.bulk_create(
+        [
+            ElectiveRecommendation(
+                user_id=user_id,
+                survey_scores={},
+                activity_scores={},
+                final_scores={},
+                recommended_elective='',
+                confidence_score=0,
+                is_stale=True,
+            )
+            for user_id in user_ids
+        ],
+        ignore_conflicts=True,
+    )
+    return {
+        user_id: (pk, version)
+        for user_id, pk, version in ElectiveRecommendation.objects.filter(user_id__in=user_ids)
+        .values_list('user_id', 'id', 'version')
+    }
+
+
+def save_unchanged(recommendations):
+    """
+    Write rows whose version is still the one they were computed against.
+
+    The rows are locked while their versions are checked, so a flag set
+    after the check waits for this write and survives it. Returns the user
+    ids of the rows written.
+    """
+    with transaction.atomic():
+        current = dict(
+            ElectiveRecommendation.objects.select_for_update()
+            .filter(pk__in=[recommendation.pk for recommendation in recommendations])
+            .values_list('id', 'version')
+        )
+        unchanged = [
+            recommendation for recommendation in recommendations
+            if current.get(recommendation.pk) == recommendation.version
+        ]
+        ElectiveRecommendation.objects.bulk_update(unchanged, UPDATE_FIELDS)
+
+    user_ids = [recommendation.user_id for recommendation in unchanged]
+    # Cached payloads still hold the previous recommendation
+    transaction.on_commit(lambda: response_cache.bump(user_ids))
+    bus.publish(bus.RESPONSE_CACHE, user_ids)
+    return user_ids
+
+
+def generate_recommendations(chunk_size=5000):
+    """
+    Recompute and store recommendations for every user with a survey.
+
+    Returns the number of rows written; rows flagged by a concurrent write
+    are left stale for the next read to recompute.
+    """
+    saved = 0
+    last_user_id = 0
+    while True:
+        page = list(
+            SurveyResult.objects.filter(user_id__gt=last_user_id)
+            .order_by('user_id')
+            .values_list('user_id', flat=True)[:chunk_size]
+        )
+        if not page:
+            return saved
+        last_user_id = page[-1]
+
+        # Versions first, then the scores they guard
+        versions = read_versions(page)
+        surveys = list(
+            SurveyResult.objects.filter(user_id__gte=page[0], user_id__lte=page[-1])
+            .order_by('user_id')
+            .values_list('user_id', 'elective_scores')
+        )
+        if not surveys:
+            continue
+
+        user_ids, survey_matrix, activity_matrix, activity_counts = score_matrices(surveys)
+        final_scores, recommended_index, confidence_score = combine_matrices(survey_matrix, activity_matrix)
+
+        date_generated = timezone.now()
+        recommendations = [
+            ElectiveRecommendation(
+                pk=versions[user_id][0],
+                user_id=user_id,
+                survey_scores=_scores_dict(survey_row),
+                survey_weight=SURVEY_WEIGHT,
+                activity_scores=_scores_dict(activity_row),
+                activity_weight=ACTIVITY_WEIGHT,
+                final_scores=_scores_dict(final_row),
+                recommended_elective=ELECTIVES[index],
+                confidence_score=confidence,
+                activities_completed=count,
+                is_stale=False,
+                version=versions[user_id][1],
+                date_generated=date_generated,
+            )
+            for user_id, survey_row, activity_row, final_row, index, confidence, count in zip(
+                user_ids.tolist(), survey_matrix.tolist(), activity_matrix.tolist(), final_scores.tolist(),
+                recommended_index.tolist(), confidence_score.tolist(), activity_counts.tolist()
+            )
+            # Surveys created after the page was read have no version to check against
+            if user_id in versions
+        ]
+        saved += len(save_unchanged(recommendations))
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recommendations.batch import generate_recommendations
+
+
+class Command(BaseCommand):
+    help = "Recompute combined elective recommendations for every student with a survey"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=5000,
+            help="Students scored and upserted per batch (default: 5000)"
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        processed = generate_recommendations(chunk_size=options['chunk_size'])
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {processed} recommendations in {elapsed:.2f}s."
+        ))
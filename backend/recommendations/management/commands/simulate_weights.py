@@ -0,0 +1,63 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recommendations.serializers import WeightSimulationSerializer
+from recommendations.simulation import load_cohort_matrices, simulate_weight_sets
+
+
+class Command(BaseCommand):
+    help = "Evaluate candidate recommendation weight sets against the whole cohort"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'weights',
+            help=(
+                "JSON list of weight sets, or a path to a file containing one. Keys: name, "
+                "survey_weight, activity_weight, completion_weight, engagement_weight, "
+                "efficiency_weight, improvement_weight (omitted keys keep current values)"
+            )
+        )
+        parser.add_argument('--json', action='store_true', help="Print the raw JSON result")
+
+    def handle(self, *args, **options):
+        raw = options['weights']
+        try:
+            if raw.lstrip().startswith('['):
+                weight_sets = json.loads(raw)
+            else:
+                with open(raw) as f:
+                    weight_sets = json.load(f)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Could not read weight sets: {exc}")
+
+        serializer = WeightSimulationSerializer(data={'weight_sets': weight_sets})
+        if not serializer.is_valid():
+            raise CommandError(f"Invalid weight sets: {serializer.errors}")
+
+        started = time.perf_counter()
+        matrices = load_cohort_matrices()
+        loaded = time.perf_counter()
+        result = simulate_weight_sets(serializer.validated_data['weight_sets'], matrices=matrices)
+        finished = time.perf_counter()
+
+        if options['json']:
+            self.stdout.write(json.dumps(result, indent=2))
+            return
+
+        self.stdout.write(f"Students: {result['students']}")
+        for entry in result['results']:
+            distribution = ", ".join(
+                f"{elective} {count} ({entry['distribution_change'][elective]:+d})"
+                for elective, count in entry['distribution'].items()
+            )
+            self.stdout.write(
+                f"{entry['name']}: {distribution} | confidence {entry['average_confidence']} "
+                f"({entry['average_confidence_change']:+}) | changed {entry['changed_recommendations']} "
+                f"({entry['changed_share']}%)"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded cohort in {loaded - started:.2f}s, evaluated "
+            f"{len(result['results'])} weight sets in {finished - loaded:.2f}s."
+        ))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='electiverecommendation',
+            name='activities_completed',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='electiverecommendation',
+            name='is_stale',
+            field=models.BooleanField(default=True),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0002_electiverecommendation_cache_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='electiverecommendation',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
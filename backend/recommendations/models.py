@@ -17,6 +17,13 @@ class ElectiveRecommendation(models.Model):
     final_scores = models.JSONField()  # {MMGD: 81, ITBA: 78.4, MobileDev: 87.2}
     recommended_elective = models.CharField(max_length=50)
     confidence_score = models.FloatField()  # 0-100
+    activities_completed = models.IntegerField(default=0)
+    
+    # Set by signals when the user's survey or activity results change; each
+    # change also bumps `version`, so a refresh only clears the flag when no
+    # write happened while it was computing
+    is_stale = models.BooleanField(default=True)
+    version = models.PositiveIntegerField(default=0)
     
     date_generated = models.DateTimeField(auto_now=True)
     
@@ -0,0 +1,23 @@
+from rest_framework import serializers
+
+MAX_WEIGHT_SETS = 100
+
+
+class WeightSetSerializer(serializers.Serializer):
+    """Candidate weights; omitted keys keep their current production value"""
+    name = serializers.CharField(required=False, max_length=100)
+    survey_weight = serializers.FloatField(required=False, min_value=0)
+    activity_weight = serializers.FloatField(required=False, min_value=0)
+    completion_weight = serializers.FloatField(required=False, min_value=0)
+    engagement_weight = serializers.FloatField(required=False, min_value=0)
+    efficiency_weight = serializers.FloatField(required=False, min_value=0)
+    improvement_weight = serializers.FloatField(required=False, min_value=0)
+
+
+class WeightSimulationSerializer(serializers.Serializer):
+    weight_sets = WeightSetSerializer(many=True, allow_empty=False)
+
+    def validate_weight_sets(self, value):
+        if len(value) > MAX_WEIGHT_SETS:
+            raise serializers.ValidationError(f"At most {MAX_WEIGHT_SETS} weight sets per simulation.")
+        return value
@@ -0,0 +1,157 @@
+"""
+Combined survey + activity recommendation logic.
+
+Recommendations are materialized in ElectiveRecommendation and recomputed
+only when the user's SurveyResult or ActivityResult rows change (see
+recommendations.signals, which flags the row as stale).
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Avg, Count
+from django.utils import timezone
+
+from activities.models import ActivityResult
+from survey.models import SurveyResult
+
+from .models import ElectiveRecommendation
+
+# Mapping between full names and codes
+ELECTIVE_NAME_TO_CODE = {
+    "Mobile Development": "MobileDev",
+    "Multimedia & Game Development": "MMGD",
+    "IT Business Analytics": "ITBA",
+}
+
+ELECTIVE_CODE_TO_NAME = {v: k for k, v in ELECTIVE_NAME_TO_CODE.items()}
+
+ELECTIVES = ["MobileDev", "ITBA", "MMGD"]
+
+# Combine survey (60%) and activity (40%) scores
+SURVEY_WEIGHT = 0.6
+ACTIVITY_WEIGHT = 0.4
+
+
+def combine_scores(survey_scores, activity_scores, survey_weight=SURVEY_WEIGHT, activity_weight=ACTIVITY_WEIGHT):
+    """Return (final_scores, recommended_elective, confidence_score)"""
+    final_scores = {}
+    for elective in ELECTIVES:
+        survey_score = survey_scores.get(elective, 0)
+        activity_score = activity_scores.get(elective, 0)
+        final_scores[elective] = round(
+            (survey_score * survey_weight) + (activity_score * activity_weight),
+            1
+        )
+
+    # Determine recommended elective (highest final score)
+    recommended_elective = max(final_scores.items(), key=lambda x: x[1])[0]
+
+    # Calculate confidence score based on gap between top and second score
+    sorted_scores = sorted(final_scores.values(), reverse=True)
+    top_score = sorted_scores[0]
+    second_score = sorted_scores[1] if len(sorted_scores) > 1 else 0
+    gap = top_score - second_score
+    # Confidence: 50% base + gap * 2 (max 100%)
+    confidence_score = min(100, round(50 + gap * 2))
+
+    return final_scores, recommended_elective, confidence_score
+
+
+def refresh_recommendation(user_id, current=None):
+    """
+    Recompute and persist the user's recommendation.
+
+    `current` is the stored row, when the caller has already loaded it.
+    Returns None (and drops any stored row) when the user has no survey.
+
+    The survey and activity rows are read after the row's `version`, and the
+    result is written back only if the version is still the same. A write
+    that lands while this runs bumps the version, so its stale flag survives
+    and the next read recomputes; this call then returns its result unsaved.
+    """
+    if current is None:
+        current = ElectiveRecommendation.objects.filter(user_id=user_id).only('id', 'version').first()
+    if current is None:
+        current = _stale_row(user_id)
+        if current is None:
+            return None
+
+    survey_result = SurveyResult.objects.filter(user_id=user_id).only("elective_scores").first()
+    if not survey_result:
+        ElectiveRecommendation.objects.filter(user_id=user_id).delete()
+        return None
+
+    # Get survey scores (should be a dict like {"MobileDev": 85, "ITBA": 72, "MMGD": 90})
+    survey_scores = survey_result.elective_scores or {}
+
+    # Ensure all electives have scores (default to 0 if missing)
+    survey_scores = {e: survey_scores.get(e, 0) for e in ELECTIVES}
+
+    # Average stored activity scores per elective in one grouped query
+    activity_totals = list(
+        ActivityResult.objects.filter(user_id=user_id).values('elective').annotate(
+            count=Count('id'),
+            average_score=Avg('performance_score'),
+        ).order_by()
+    )
+    activities_completed = sum(row['count'] for row in activity_totals)
+
+    averages_by_elective = {row['elective']: row['average_score'] for row in activity_totals}
+    activity_scores = {e: averages_by_elective.get(e, 0) for e in ELECTIVES}
+
+    final_scores, recommended_elective, confidence_score = combine_scores(survey_scores, activity_scores)
+
+    fields = {
+        'survey_scores': survey_scores,
+        'survey_weight': SURVEY_WEIGHT,
+        'activity_scores': activity_scores,
+        'activity_weight': ACTIVITY_WEIGHT,
+        'final_scores': final_scores,
+        'recommended_elective': recommended_elective,
+        'confidence_score': confidence_score,
+        'activities_completed': activities_completed,
+        'date_generated': timezone.now(),
+    }
+    # Compare-and-set: only clear the flag if nothing changed since `current` was read
+    saved = ElectiveRecommendation.objects.filter(pk=current.pk, version=current.version).update(
+        is_stale=False, **fields
+    )
+    return ElectiveRecommendation(
+        pk=current.pk, user_id=user_id, is_stale=not saved, version=current.version, **fields
+    )
+
+
+def _stale_row(user_id):
+    """
+    Stored row for a user who has none yet, flagged stale until the first
+    refresh (None when the user has no survey).
+
+    Writers can only flag an existing row, so it is created before any
+    survey or activity data is read.
+    """
+    if not SurveyResult.objects.filter(user_id=user_id).exists():
+        return None
+    try:
+        with transaction.atomic():
+            return ElectiveRecommendation.objects.create(
+                user_id=user_id,
+                survey_scores={},
+                activity_scores={},
+                final_scores={},
+                recommended_elective='',
+                confidence_score=0,
+                is_stale=True,
+            )
+    except IntegrityError:
+        # A concurrent request created it first
+        return ElectiveRecommendation.objects.only('id', 'version').get(user_id=user_id)
+
+
+def get_recommendation(user_id):
+    """Serve the stored recommendation, recomputing it only when missing or stale"""
+    recommendation = ElectiveRecommendation.objects.filter(user_id=user_id).first()
+    if recommendation is None:
+        recommendation = _stale_row(user_id)
+        if recommendation is None:
+            return None
+    if recommendation.is_stale:
+        recommendation = refresh_recommendation(user_id, current=recommendation)
+    return recommendation
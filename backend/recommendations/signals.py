@@ -0,0 +1,25 @@
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from activities.models import ActivityResult
+from activities.signals import activity_results_changed
+from survey.models import SurveyResult
+
+from .models import ElectiveRecommendation
+
+
+@receiver(post_save, sender=SurveyResult)
+def survey_result_saved(sender, instance, **kwargs):
+    ElectiveRecommendation.objects.filter(user_id=instance.user_id).update(is_stale=True, version=F('version') + 1)
+
+
+@receiver(post_delete, sender=SurveyResult)
+def survey_result_deleted(sender, instance, **kwargs):
+    # Without a survey there is nothing to recommend
+    ElectiveRecommendation.objects.filter(user_id=instance.user_id).delete()
+
+
+@receiver(activity_results_changed, sender=ActivityResult)
+def activity_results_changed_handler(sender, user_ids, **kwargs):
+    ElectiveRecommendation.objects.filter(user_id__in=set(user_ids)).update(is_stale=True, version=F('version') + 1)
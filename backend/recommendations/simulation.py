@@ -0,0 +1,194 @@
+"""
+What-if simulation of recommendation weights over the whole cohort.
+
+The cohort is loaded once into matrices (survey scores per user/elective
+and the four performance score components per activity row) and kept in a
+short-lived process cache. Candidate weight sets are then evaluated
+together: activity scores for every set come from one matrix product,
+per-elective averages from one segmented reduction, and the 60/40 style
+blend, argmax and confidence gap from recommendations.batch.combine_matrices.
+"""
+import threading
+import time
+
+import numpy as np
+
+from activities.models import ActivityResult, PERFORMANCE_SCORE_WEIGHTS
+from survey.models import SurveyResult
+
+from .batch import ELECTIVE_INDEX, combine_matrices, survey_value
+from .services import ELECTIVES, SURVEY_WEIGHT, ACTIVITY_WEIGHT
+
+# How long loaded cohort matrices are reused before reloading (seconds)
+MATRIX_CACHE_TTL = 300
+
+# Weight sets evaluated per matrix pass; bounds the (rows x sets) score matrix
+EVALUATION_BATCH_SIZE = 16
+
+# Weight-set keys and their current production values
+DEFAULT_WEIGHTS = {
+    'survey_weight': SURVEY_WEIGHT,
+    'activity_weight': ACTIVITY_WEIGHT,
+    'completion_weight': PERFORMANCE_SCORE_WEIGHTS['completion'],
+    'engagement_weight': PERFORMANCE_SCORE_WEIGHTS['engagement'],
+    'efficiency_weight': PERFORMANCE_SCORE_WEIGHTS['efficiency'],
+    'improvement_weight': PERFORMANCE_SCORE_WEIGHTS['improvement'],
+}
+COMPONENT_WEIGHT_KEYS = ['completion_weight', 'engagement_weight', 'efficiency_weight', 'improvement_weight']
+
+_cache_lock = threading.Lock()
+_cache = {'loaded_at': None, 'matrices': None}
+
+
+class CohortMatrices:
+    """Score matrices for every student with a survey"""
+
+    def __init__(self, user_ids, survey_matrix, components, group_starts, groups, group_counts):
+        self.user_ids = user_ids            # (n,) sorted user ids
+        self.survey_matrix = survey_matrix  # (n, electives) survey elective scores
+        self.components = components        # (m, 4) activity rows sorted by group
+        self.group_starts = group_starts    # start offset of each (user, elective) group in components
+        self.groups = groups                # flat user_row * electives + column of each group
+        self.group_counts = group_counts    # activity rows per group
+
+    @property
+    def student_count(self):
+        return len(self.user_ids)
+
+
+def load_cohort_matrices(chunk_size=10000):
+    """Load the whole cohort with two streamed queries"""
+    user_ids = []
+    survey_rows = []
+    surveys = SurveyResult.objects.order_by('user_id').values_list('user_id', 'elective_scores')
+    for user_id, scores in surveys.iterator(chunk_size=chunk_size):
+        user_ids.append(user_id)
+        survey_rows.append([survey_value(scores or {}, e) for e in ELECTIVES])
+
+    user_ids = np.array(user_ids, dtype=np.int64)
+    survey_matrix = np.array(survey_rows, dtype=np.float64).reshape(len(user_ids), len(ELECTIVES))
+
+    activity_rows = list(
+        ActivityResult.objects.order_by().values_list(
+            'user_id', 'elective', 'completed', 'engagement_score', 'time_efficiency', 'improvement_rate'
+        ).iterator(chunk_size=chunk_size)
+    )
+    activities = np.array(
+        [
+            (user_id, ELECTIVE_INDEX.get(elective, -1), completed, engagement, efficiency, improvement)
+            for user_id, elective, completed, engagement, efficiency, improvement in activity_rows
+        ],
+        dtype=np.float64
+    ).reshape(len(activity_rows), 6)
+    del activity_rows
+
+    activity_user_ids = activities[:, 0].astype(np.int64)
+    columns = activities[:, 1].astype(np.int64)
+    if len(user_ids):
+        rows = np.clip(np.searchsorted(user_ids, activity_user_ids), 0, len(user_ids) - 1)
+        keep = (user_ids[rows] == activity_user_ids) & (columns >= 0)
+    else:
+        rows = np.zeros(len(activities), dtype=np.int64)
+        keep = np.zeros(len(activities), dtype=bool)
+
+    flat_groups = rows[keep] * len(ELECTIVES) + columns[keep]
+    components = np.column_stack([
+        activities[keep, 2],                             # completed (0/1)
+        activities[keep, 3],                             # engagement_score
+        activities[keep, 4],                             # time_efficiency
+        np.minimum(100, activities[keep, 5] * 20),       # capped improvement
+    ])
+
+    order = np.argsort(flat_groups, kind='stable')
+    flat_groups = flat_groups[order]
+    components = components[order]
+    groups, group_starts, group_counts = np.unique(flat_groups, return_index=True, return_counts=True)
+
+    return CohortMatrices(user_ids, survey_matrix, components, group_starts, groups, group_counts)
+
+
+def get_cohort_matrices(max_age=MATRIX_CACHE_TTL):
+    """Cohort matrices from the process cache, reloading when older than `max_age` seconds"""
+    with _cache_lock:
+        loaded_at = _cache['loaded_at']
+        if loaded_at is None or time.monotonic() - loaded_at > max_age:
+            _cache['matrices'] = load_cohort_matrices()
+            _cache['loaded_at'] = time.monotonic()
+        return _cache['matrices']
+
+
+def normalize_weight_set(weight_set, index=0):
+    """Fill missing keys with the current production weights"""
+    weights = {key: float(weight_set.get(key, default)) for key, default in DEFAULT_WEIGHTS.items()}
+    return {'name': weight_set.get('name') or f"set_{index + 1}", 'weights': weights}
+
+
+def _evaluate(matrices, weight_sets):
+    """Recommended elective index and confidence per weight set: arrays of shape (k, n)"""
+    n = matrices.student_count
+    k = len(weight_sets)
+
+    component_weights = np.array(
+        [[ws['weights'][key] for key in COMPONENT_WEIGHT_KEYS] for ws in weight_sets], dtype=np.float64
+    )
+    survey_weights = np.array([ws['weights']['survey_weight'] for ws in weight_sets]).reshape(k, 1, 1)
+    activity_weights = np.array([ws['weights']['activity_weight'] for ws in weight_sets]).reshape(k, 1, 1)
+
+    # Activity scores under every weight set at once: (m, k)
+    scores = np.minimum(100, matrices.components @ component_weights.T)
+
+    averages = np.zeros((n * len(ELECTIVES), k))
+    if len(matrices.groups):
+        sums = np.add.reduceat(scores, matrices.group_starts, axis=0)
+        averages[matrices.groups] = sums / matrices.group_counts[:, None]
+    activity_matrix = averages.reshape(n, len(ELECTIVES), k).transpose(2, 0, 1)
+
+    _, recommended_index, confidence = combine_matrices(
+        matrices.survey_matrix[None, :, :], activity_matrix, survey_weights, activity_weights
+    )
+    return recommended_index, confidence
+
+
+def simulate_weight_sets(weight_sets, matrices=None):
+    """
+    Evaluate candidate weight sets against the current weights.
+
+    Returns a dict with the cohort size and one result per weight set (the
+    current weights first), each with the recommended-elective distribution,
+    average confidence and how both differ from the current weights.
+    """
+    matrices = matrices or get_cohort_matrices()
+    candidates = [normalize_weight_set({'name': 'current'})] + [
+        normalize_weight_set(ws, i) for i, ws in enumerate(weight_sets)
+    ]
+
+    n = matrices.student_count
+    if n:
+        batches = [
+            _evaluate(matrices, candidates[start:start + EVALUATION_BATCH_SIZE])
+            for start in range(0, len(candidates), EVALUATION_BATCH_SIZE)
+        ]
+        recommended_index = np.concatenate([index for index, _ in batches])
+        confidence = np.concatenate([conf for _, conf in batches])
+        distribution = (recommended_index[:, :, None] == np.arange(len(ELECTIVES))).sum(axis=1)
+        average_confidence = confidence.mean(axis=1)
+        changed = (recommended_index != recommended_index[0]).sum(axis=1)
+    else:
+        distribution = np.zeros((len(candidates), len(ELECTIVES)), dtype=np.int64)
+        average_confidence = np.zeros(len(candidates))
+        changed = np.zeros(len(candidates), dtype=np.int64)
+
+    results = []
+    for i, candidate in enumerate(candidates):
+        results.append({
+            'name': candidate['name'],
+            'weights': candidate['weights'],
+            'distribution': dict(zip(ELECTIVES, distribution[i].tolist())),
+            'distribution_change': dict(zip(ELECTIVES, (distribution[i] - distribution[0]).tolist())),
+            'average_confidence': round(float(average_confidence[i]), 2),
+            'average_confidence_change': round(float(average_confidence[i] - average_confidence[0]), 2),
+            'changed_recommendations': int(changed[i]),
+            'changed_share': round(float(changed[i]) / n * 100, 2) if n else 0,
+        })
+
+    return {'students': n, 'results': results}
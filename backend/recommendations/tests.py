@@ -0,0 +1,45 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from survey.models import SurveyResult
+
+from . import batch
+from .batch import generate_recommendations
+from .models import ElectiveRecommendation
+
+
+class GenerateRecommendationsTests(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(f'student{i}', password='password') for i in range(3)]
+        for user in self.users:
+            SurveyResult.objects.create(
+                user=user,
+                selected_elective='ITBA',
+                trait_scores={},
+                elective_scores={'MobileDev': 40, 'ITBA': 80, 'MMGD': 60},
+            )
+
+    def test_stores_fresh_rows_for_every_surveyed_user(self):
+        self.assertEqual(generate_recommendations(chunk_size=2), 3)
+
+        for recommendation in ElectiveRecommendation.objects.all():
+            self.assertFalse(recommendation.is_stale)
+            self.assertEqual(recommendation.recommended_elective, 'ITBA')
+        self.assertEqual(ElectiveRecommendation.objects.count(), 3)
+
+    def test_row_flagged_while_scoring_stays_stale(self):
+        flagged = self.users[1]
+        score_matrices = batch.score_matrices
+
+        def write_while_scoring(surveys):
+            # A survey retake lands after the versions were read
+            SurveyResult.objects.get(user=flagged).save()
+            return score_matrices(surveys)
+
+        with mock.patch.object(batch, 'score_matrices', write_while_scoring):
+            self.assertEqual(generate_recommendations(), 2)
+
+        self.assertTrue(ElectiveRecommendation.objects.get(user=flagged).is_stale)
+        self.assertFalse(ElectiveRecommendation.objects.get(user=self.users[0]).is_stale)
@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import GenerateRecommendationView
+from .views import GenerateRecommendationView, WeightSimulationView
 
 urlpatterns = [
     path("recommendation/", GenerateRecommendationView.as_view(), name="combined-recommendation"),
+    path("recommendation/simulate/", WeightSimulationView.as_view(), name="recommendation-simulate"),
 ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:41
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def copy_date_completed(apps, schema_editor):
+    SurveyResult = apps.get_model('survey', 'SurveyResult')
+    SurveyResult.objects.update(date_updated=models.F('date_completed'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('survey', '0005_delete_activityresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='surveyresult',
+            name='date_updated',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_date_completed, migrations.RunPython.noop),
+    ]
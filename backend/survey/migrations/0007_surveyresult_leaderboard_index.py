@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('survey', '0006_surveyresult_date_updated'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='surveyresult',
+            index=models.Index(fields=['completion_time', 'date_completed', 'id'], name='survey_leaderboard_idx'),
+        ),
+    ]
@@ -7,6 +7,7 @@ class SurveyResult(models.Model):
     trait_scores = models.JSONField()
     elective_scores = models.JSONField()
     date_completed = models.DateTimeField(auto_now_add=True)
+    date_updated = models.DateTimeField(auto_now=True)  # Bumped on retakes; used as a cache validator
     
     # Leaderboard fields
     total_xp = models.IntegerField(default=0)
@@ -14,5 +15,11 @@ class SurveyResult(models.Model):
     completion_time = models.DurationField(null=True, blank=True)
     questions_answered = models.IntegerField(default=0)
 
+    class Meta:
+        indexes = [
+            # Leaderboard order, rank counts and neighbor lookups (survey.views)
+            models.Index(fields=['completion_time', 'date_completed', 'id'], name='survey_leaderboard_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.selected_elective} (Level {self.level})"
@@ -0,0 +1,23 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.cache import expire_shared
+from core.response_cache import response_cache
+from invalidation import bus
+
+from .models import SurveyResult
+
+
+@receiver([post_save, post_delete], sender=SurveyResult)
+def survey_result_changed(sender, instance, **kwargs):
+    # Refresh the cached leaderboard on the next read instead of waiting for its TTL,
+    # and drop this user's cached analysis/recommendation payloads. Both wait for the
+    # commit, or a concurrent request could cache the old rows again first.
+    user_id = instance.user_id
+    transaction.on_commit(lambda: expire_shared('leaderboard'))
+    transaction.on_commit(lambda: response_cache.bump([user_id]))
+    
+    # Same for the other workers' caches
+    bus.publish(bus.SHARED_CACHE, ['leaderboard'])
+    bus.publish(bus.RESPONSE_CACHE, [instance.user_id])
@@ -3,10 +3,12 @@ from .views import (
     SurveyResultView, 
     SurveyResultMeView, 
     LeaderboardView,
+    LeaderboardRankView,
 )
 
 urlpatterns = [
     path("survey-result/", SurveyResultView.as_view(), name="survey-result"),
     path("survey-result/me/", SurveyResultMeView.as_view(), name="survey-result-me"),
     path("leaderboard/", LeaderboardView.as_view(), name="leaderboard"),
+    path("leaderboard/me/", LeaderboardRankView.as_view(), name="leaderboard-me"),
 ]
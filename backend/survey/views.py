@@ -2,18 +2,83 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import F, Avg, Count
+from django.db.models import F, Avg, Count, Q
 from django.contrib.auth.models import User
 import logging
 
+from core.cache import shared_cached
+from core.conditional import conditional_get, user_data_etag
+
 from .models import SurveyResult
 from .serializers import SurveyResultSerializer
 
 logger = logging.getLogger(__name__)
 
 
+# Faster completion = better rank; earlier completion, then id, break ties
+LEADERBOARD_ORDER = ['completion_time', 'date_completed', 'id']
+
+LEADERBOARD_COLUMNS = ['user_id', 'user__username', 'completion_time', 'selected_elective', 'date_completed']
+
+# Entries kept in the shared cache (the leaderboard and dashboard show at most this many)
+LEADERBOARD_SIZE = 10
+
+
+def completed_surveys():
+    # Only include completed surveys
+    return SurveyResult.objects.filter(completion_time__isnull=False)
+
+
+def leaderboard_entry(rank, values, user):
+    user_id, username, completion_time, selected_elective, date_completed = values
+    
+    # Format completion time for display
+    completion_seconds = completion_time.total_seconds()
+    minutes = int(completion_seconds // 60)
+    seconds = int(completion_seconds % 60)
+    
+    return {
+        'rank': rank,
+        'username': username,
+        'completion_time_display': f"{minutes}:{seconds:02d}",
+        'completion_time_seconds': completion_seconds,
+        'selected_elective': selected_elective,
+        'date_completed': date_completed,
+        'is_current_user': user_id == user.id
+    }
+
+
+def leaderboard_rows(user, limit=10):
+    """Top `limit` (at most LEADERBOARD_SIZE) survey completions, fastest first (shared with the dashboard)"""
+    leaderboard = shared_cached('leaderboard', top_leaderboard_values)[:limit]
+    return [leaderboard_entry(rank, values, user) for rank, values in enumerate(leaderboard, 1)]
+
+
+def top_leaderboard_values():
+    return list(completed_surveys().order_by(*LEADERBOARD_ORDER).values_list(*LEADERBOARD_COLUMNS)[:LEADERBOARD_SIZE])
+
+
+def ranked_ahead(survey):
+    """Filter for the completed surveys that rank ahead of `survey`"""
+    return (
+        Q(completion_time__lt=survey.completion_time)
+        | Q(completion_time=survey.completion_time, date_completed__lt=survey.date_completed)
+        | Q(completion_time=survey.completion_time, date_completed=survey.date_completed, id__lt=survey.id)
+    )
+
+
+def ranked_behind(survey):
+    """Filter for the completed surveys that rank behind `survey`"""
+    return (
+        Q(completion_time__gt=survey.completion_time)
+        | Q(completion_time=survey.completion_time, date_completed__gt=survey.date_completed)
+        | Q(completion_time=survey.completion_time, date_completed=survey.date_completed, id__gt=survey.id)
+    )
+
+
 class SurveyResultView(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = {'POST': 6}
 
     def post(self, request):
         serializer = SurveyResultSerializer(data=request.data, context={"request": request})
@@ -27,7 +92,9 @@ class SurveyResultView(APIView):
 
 class SurveyResultMeView(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = {'GET': 3}
 
+    @conditional_get(user_data_etag)
     def get(self, request):
         user = request.user
         try:
@@ -59,31 +126,62 @@ class SurveyResultMeView(APIView):
 
 class LeaderboardView(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 2
 
     def get(self, request):
-        # Get top 10 users by completion time (fastest first)
-        leaderboard = SurveyResult.objects.select_related('user').filter(
-            completion_time__isnull=False  # Only include completed surveys
-        ).order_by(
-            'completion_time',     # Faster completion = better rank
-            'date_completed'       # Earlier completion = tiebreaker
-        )[:10]
+        leaderboard_data = leaderboard_rows(request.user)
+        return Response(leaderboard_data, status=status.HTTP_200_OK)
+
+
+class LeaderboardRankView(APIView):
+    """
+    The requesting user's leaderboard rank, including outside the top 10.
+    
+    `?neighbors=N` (max 10) also returns the N entries ranked just above and
+    below the user. Every query is a range scan on the
+    (completion_time, date_completed, id) index.
+    """
+    permission_classes = [IsAuthenticated]
+    query_budget = 5
+    
+    max_neighbors = 10
+    
+    def get(self, request):
+        user = request.user
+        try:
+            neighbors = max(0, min(int(request.query_params.get('neighbors', 0)), self.max_neighbors))
+        except ValueError:
+            return Response(
+                {"detail": "neighbors must be an integer"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        leaderboard_data = []
-        for rank, result in enumerate(leaderboard, 1):
-            # Format completion time for display
-            completion_seconds = result.completion_time.total_seconds()
-            minutes = int(completion_seconds // 60)
-            seconds = int(completion_seconds % 60)
+        survey = completed_surveys().filter(user=user).only(
+            'id', 'completion_time', 'date_completed', 'selected_elective'
+        ).first()
+        if survey is None:
+            return Response(
+                {"detail": "No completed survey found."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        rank = completed_surveys().filter(ranked_ahead(survey)).count() + 1
+        values = (user.id, user.username, survey.completion_time, survey.selected_elective, survey.date_completed)
+        data = {
+            'rank': rank,
+            'entry': leaderboard_entry(rank, values, user),
+        }
+        
+        if neighbors:
+            above = completed_surveys().filter(ranked_ahead(survey)).order_by(
+                *['-' + field for field in LEADERBOARD_ORDER]
+            ).values_list(*LEADERBOARD_COLUMNS)[:neighbors]
+            below = completed_surveys().filter(ranked_behind(survey)).order_by(
+                *LEADERBOARD_ORDER
+            ).values_list(*LEADERBOARD_COLUMNS)[:neighbors]
             
-            leaderboard_data.append({
-                'rank': rank,
-                'username': result.user.username,
-                'completion_time_display': f"{minutes}:{seconds:02d}",
-                'completion_time_seconds': completion_seconds,
-                'selected_elective': result.selected_elective,
-                'date_completed': result.date_completed,
-                'is_current_user': result.user == request.user
-            })
+            # `above` comes nearest first; list it best rank first like the leaderboard
+            data['above'] = [leaderboard_entry(rank - offset, values, user) for offset, values in enumerate(above, 1)][::-1]
+            data['below'] = [leaderboard_entry(rank + offset, values, user) for offset, values in enumerate(below, 1)]
         
-        return Response(leaderboard_data, status=status.HTTP_200_OK)
+        return Response(data, status=status.HTTP_200_OK)
@@ -17,13 +17,11 @@ export function useActivityTracking(elective, activityName) {
   useEffect(() => {
     const checkCompletion = async () => {
       try {
-        const response = await authFetch(`${API_BASE_URL}/api/activity-result/`);
+        const params = new URLSearchParams({ elective, activity_name: activityName });
+        const response = await authFetch(`${API_BASE_URL}/api/activity-result/lookup/?${params}`);
         if (response.ok) {
-          const activities = await response.json();
-          const existingActivity = activities.find(
-            a => a.elective === elective && a.activity_name === activityName && a.completed === true
-          );
-          if (existingActivity) {
+          const activity = await response.json();
+          if (activity.completed) {
             setIsAlreadyCompleted(true);
             savedRef.current = true;
             console.log(`✅ Activity "${activityName}" was already completed`);
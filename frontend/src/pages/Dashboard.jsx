@@ -33,34 +33,16 @@ export default function Dashboard() {
 
   const fetchDashboardData = async () => {
     try {
-      // Fetch survey result
+      // Fetch survey, recommendation, completed activities and leaderboard preview (top 3) in one request
       const API_URL = import.meta.env.VITE_API_URL;
-    const surveyRes = await authFetch(`${API_URL}/api/survey-result/me/`);
-      if (surveyRes.ok) {
-        setSurveyData(await surveyRes.json());
-      }
-
-      // Fetch recommendation
-      const recRes = await authFetch(`${API_URL}/api/recommendation/`);
-      if (recRes.ok) {
-        setRecommendationData(await recRes.json());
-      }
-
-      // Fetch activity results
-      const activityRes = await authFetch(`${API_URL}/api/activity-result/`);
-      if (activityRes.ok) {
-        const activities = await activityRes.json();
-        // Filter only completed activities
-        const completedActivities = activities.filter(a => a.completed === true);
-        setActivityData(completedActivities);
-        console.log('✅ Loaded activity data:', completedActivities);
-      }
-
-      // Fetch leaderboard preview (top 3)
-      const leaderRes = await authFetch(`${API_URL}/api/leaderboard/`);
-      if (leaderRes.ok) {
-        const data = await leaderRes.json();
-        setLeaderboardPreview(data.slice(0, 3));
+      const dashboardRes = await authFetch(`${API_URL}/api/dashboard/?completed=true&leaderboard_limit=3`);
+      if (dashboardRes.ok) {
+        const data = await dashboardRes.json();
+        setSurveyData(data.survey);
+        setRecommendationData(data.recommendation);
+        setActivityData(data.activities);
+        setLeaderboardPreview(data.leaderboard);
+        console.log('✅ Loaded activity data:', data.activities);
       }
     } catch (error) {
       console.error('Error fetching dashboard data:', error);